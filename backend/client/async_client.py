@@ -0,0 +1,231 @@
+import asyncio
+import inspect
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+import httpx
+
+from client.main import is_terminal_status
+
+logger = logging.getLogger(__name__)
+
+StatusCallback = Callable[[Dict[str, Any], Optional[str]], Union[None, Awaitable[None]]]
+HumanInputCallback = Callable[[Dict[str, Any], str], Union[Optional[str], Awaitable[Optional[str]]]]
+
+
+async def _maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+class AsyncClient:
+    """Asyncio client with a pooled HTTP session, able to monitor thousands of agents at once"""
+
+    def __init__(self, base_url: str = "http://localhost:8000", max_connections: int = 20, timeout: float = 30.0):
+        self.base_url = base_url
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the pooled HTTP session"""
+        await self.http.aclose()
+
+    async def launch(self, input_prompt: str, idempotency_key: Optional[str] = None, dedup: bool = False) -> Dict[str, Any]:
+        """Launch a new agent and return the initial state (retries with the same idempotency_key return the same run)"""
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        response = await self.http.post(
+            "/agent/launch", json={"input_prompt": input_prompt, "dedup": dedup}, headers=headers
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def resume(self, state_id: str) -> Dict[str, Any]:
+        """Resume a paused agent by its state ID"""
+        response = await self.http.post("/agent/resume", json={"id": state_id})
+        response.raise_for_status()
+        return response.json()
+
+    async def get_state(self, state_id: str) -> Dict[str, Any]:
+        """Get the current state of an agent by its ID"""
+        response = await self.http.get(f"/agent/state/{state_id}")
+        response.raise_for_status()
+        return response.json()
+
+    async def get_states(self, state_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get the current state of many agents in one request"""
+        response = await self.http.get("/agent/states", params={"ids": ",".join(state_ids)})
+        response.raise_for_status()
+        return response.json()
+
+    async def get_state_summaries(self, state_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get id, status, steps, final_answer, error and pending question of many agents (no context)"""
+        response = await self.http.get("/agent/states/summary", params={"ids": ",".join(state_ids)})
+        response.raise_for_status()
+        return response.json()
+
+    async def provide_input(self, state_id: str, answer: str) -> Dict[str, Any]:
+        """Provide human input to a state waiting for human input"""
+        response = await self.http.post("/agent/provide_input", json={"id": state_id, "answer": answer})
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def extract_ask_human_question(state: Dict[str, Any]) -> Optional[str]:
+        """Extract the question of the last ask_human call in the state context"""
+        for item in reversed(state.get("context", [])):
+            if isinstance(item, dict) and item.get("type") == "function_call" and item.get("name") == "ask_human":
+                try:
+                    return json.loads(item.get("arguments") or "{}").get("question")
+                except json.JSONDecodeError:
+                    return None
+        return None
+
+    async def watch(
+        self,
+        state_ids: Iterable[str],
+        on_status_change: Optional[StatusCallback] = None,
+        on_human_input: Optional[HumanInputCallback] = None,
+        min_interval: float = 0.5,
+        max_interval: float = 10.0,
+        backoff: float = 1.5,
+        batch_size: int = 200,
+        max_concurrent_answers: int = 20,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Watch many agents until each reaches a terminal status.
+
+        Every agent has its own polling interval: it resets to min_interval whenever the agent
+        makes progress and grows by `backoff` (up to max_interval) while it is idle. Agents that
+        are due are fetched together through the bulk summary endpoint, so no context is transferred.
+        Agents waiting for input are answered concurrently, up to max_concurrent_answers at a time.
+        A failed poll or answer only affects the agents involved: they are retried after backing off
+        (at least as long as a 429 response's Retry-After), and an answer is resent without asking again.
+
+        Args:
+            state_ids: The states to watch
+            on_status_change: Optional callback(summary, previous_status), sync or async
+            on_human_input: Optional callback(summary, question) returning the answer (or None to skip), sync or async
+            min_interval: Polling interval in seconds for agents that are making progress
+            max_interval: Upper bound for the polling interval of idle agents
+            backoff: Factor applied to the interval after a poll without changes
+            batch_size: Maximum number of IDs per bulk request
+            max_concurrent_answers: Maximum number of on_human_input / provide_input calls in flight
+
+        Returns:
+            Final summary per ID (None for IDs the server does not know)
+        """
+        loop = asyncio.get_running_loop()
+        watched = {
+            state_id: {"status": None, "steps": None, "interval": min_interval, "due": 0.0, "answer": None}
+            for state_id in state_ids
+        }
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        answer_slots = asyncio.Semaphore(max_concurrent_answers)
+
+        async def answer(state_id: str, state: Dict[str, Any], changed: bool) -> Dict[str, Any]:
+            info = watched[state_id]
+            async with answer_slots:
+                if changed:
+                    question = state.get("question") or "Please provide input"
+                    info["answer"] = await _maybe_await(on_human_input(state, question))
+                if info["answer"] is None:
+                    return state
+                # On failure the answer is kept and sent again on the next attempt
+                answered = await self.provide_input(state_id, info["answer"])
+            info["answer"] = None
+            info["status"] = answered["status"]
+            return {**state, "status": answered["status"], "question": None}
+
+        def settle(state_id: str, state: Dict[str, Any], changed: bool, now: float):
+            info = watched[state_id]
+            if is_terminal_status(state["status"]):
+                results[state_id] = state
+                del watched[state_id]
+                return
+            info["interval"] = min_interval if changed else min(info["interval"] * backoff, max_interval)
+            info["due"] = now + info["interval"]
+
+        def retry_later(state_id: str, info: Dict[str, Any], error: httpx.HTTPError, now: float):
+            retry_after = 0.0
+            if isinstance(error, httpx.HTTPStatusError):
+                try:
+                    retry_after = float(error.response.headers.get("Retry-After") or 0)
+                except ValueError:
+                    pass
+            info["interval"] = min(info["interval"] * backoff, max_interval)
+            info["due"] = now + max(info["interval"], retry_after)
+            logger.warning("Request for agent %s failed, retrying in %.1fs: %s", state_id, info["due"] - now, error)
+
+        while watched:
+            now = loop.time()
+            due_ids = [state_id for state_id, info in watched.items() if info["due"] <= now]
+            if not due_ids:
+                await asyncio.sleep(min(info["due"] for info in watched.values()) - now)
+                continue
+
+            batches = [due_ids[i:i + batch_size] for i in range(0, len(due_ids), batch_size)]
+            responses = await asyncio.gather(
+                *(self.get_state_summaries(batch) for batch in batches), return_exceptions=True
+            )
+            states = {}
+            failed = {}
+            for batch, response in zip(batches, responses):
+                if isinstance(response, httpx.HTTPError):
+                    failed.update((state_id, response) for state_id in batch)
+                elif isinstance(response, BaseException):
+                    raise response
+                else:
+                    states.update((state["id"], state) for state in response)
+            now = loop.time()
+
+            waiting = []
+            for state_id in due_ids:
+                info = watched[state_id]
+                if state_id in failed:
+                    retry_later(state_id, info, failed[state_id], now)
+                    continue
+
+                state = states.get(state_id)
+                if state is None:
+                    results[state_id] = None
+                    del watched[state_id]
+                    continue
+
+                previous_status = info["status"]
+                changed = state["status"] != previous_status or state["steps"] != info["steps"]
+                info["status"], info["steps"] = state["status"], state["steps"]
+
+                if state["status"] != previous_status and on_status_change:
+                    await _maybe_await(on_status_change(state, previous_status))
+
+                if state["status"] == "waiting_human_input" and on_human_input:
+                    waiting.append((state_id, state, changed))
+                    continue
+                info["answer"] = None
+                settle(state_id, state, changed, now)
+
+            # Answer every waiting agent of this round together instead of one after another
+            answered = await asyncio.gather(
+                *(answer(state_id, state, changed) for state_id, state, changed in waiting), return_exceptions=True
+            )
+            now = loop.time()
+            for (state_id, _, changed), state in zip(waiting, answered):
+                if isinstance(state, httpx.HTTPError):
+                    retry_later(state_id, watched[state_id], state, now)
+                elif isinstance(state, BaseException):
+                    raise state
+                else:
+                    settle(state_id, state, changed, now)
+
+        return results
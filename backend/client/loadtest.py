@@ -0,0 +1,476 @@
+"""
+End-to-end load test for the agent server without real OpenAI calls.
+
+Starts a local fake Responses API server that answers with scripted tool-call
+sequences after a configurable latency, starts the FastAPI server pointed at it
+(or targets one already running), launches many agents concurrently through
+`Client`, answers their ask_human prompts and reports throughput, time to
+complete, database growth and error rates.
+
+    python -m client.loadtest --agents 200 --concurrency 50 --latency lognormal:0.4,0.6
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from client.main import Client, is_terminal_status
+
+
+# One list of function calls per LLM turn; the last turn repeats once the script runs out
+DEFAULT_SCRIPT = [
+    [{"name": "evaluate_expression", "arguments": {"expression": "x**2 - 5*x + 6", "variables": {"x": [1, 2, 3, 4]}}}],
+    [{"name": "ask_human", "arguments": {"question": "Should I report every root?"}}],
+    [
+        {"name": "sum_numbers", "arguments": {"a": 2, "b": 3}},
+        {"name": "multiply_numbers", "arguments": {"a": 2, "b": 3}},
+    ],
+    [{"name": "final_answer", "arguments": {"answer": "x = 2 or x = 3"}}],
+]
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Parse a latency distribution into a sampler returning seconds.
+
+    Supported specs: "fixed:S", "uniform:MIN,MAX", "normal:MEAN,STDDEV",
+    "lognormal:MEDIAN,SIGMA" and "exponential:MEAN".
+    """
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(",")] if params else []
+    except ValueError:
+        raise ValueError(f"Invalid latency parameters: {spec}")
+
+    samplers = {
+        "fixed": (1, lambda s: s),
+        "uniform": (2, random.uniform),
+        "normal": (2, lambda mean, stddev: max(0.0, random.gauss(mean, stddev))),
+        "lognormal": (2, lambda median, sigma: random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0),
+        "exponential": (1, lambda mean: random.expovariate(1 / mean) if mean > 0 else 0.0),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution '{kind}', expected one of {', '.join(samplers)}")
+    arity, sampler = samplers[kind]
+    if len(values) != arity:
+        raise ValueError(f"Latency distribution '{kind}' takes {arity} parameter(s)")
+    return lambda: sampler(*values)
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of the values (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class FakeResponsesServer:
+    """
+    Minimal stand-in for the OpenAI Responses API (POST /v1/responses).
+
+    The turn of a conversation is recovered from the call ids of earlier function calls in
+    the request input, so concurrent agents each walk through the script independently.
+    """
+
+    def __init__(
+        self,
+        script: Optional[List[List[dict]]] = None,
+        latency: Callable[[], float] = lambda: 0.0,
+        error_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.script = script or DEFAULT_SCRIPT
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _turn(input_items: List[Any]) -> int:
+        # Call ids look like call_<turn>_<index>_<random>
+        turns = [
+            int(item["call_id"].split("_")[1])
+            for item in input_items
+            if isinstance(item, dict) and item.get("type") == "function_call"
+            and str(item.get("call_id", "")).startswith("call_")
+            and item["call_id"].split("_")[1].isdigit()
+        ]
+        return max(turns) + 1 if turns else 0
+
+    def respond(self, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build the response for a request body, or None to simulate a server error"""
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and random.random() < self.error_rate:
+                self.errors += 1
+                return None
+
+        turn = self._turn(body.get("input") or [])
+        calls = self.script[min(turn, len(self.script) - 1)]
+        output = [
+            {
+                "type": "function_call",
+                "id": f"fc_{uuid.uuid4().hex}",
+                "call_id": f"call_{turn}_{index}_{uuid.uuid4().hex[:8]}",
+                "name": call["name"],
+                "arguments": json.dumps(call.get("arguments", {})),
+                "status": "completed",
+            }
+            for index, call in enumerate(calls)
+        ]
+        input_tokens = len(json.dumps(body.get("input"), default=str)) // 4
+        output_tokens = sum(len(item["name"]) + len(item["arguments"]) for item in output) // 4
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model"),
+            "status": "completed",
+            "output": output,
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if not self.path.rstrip("/").endswith("/responses"):
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                time.sleep(fake.latency())
+                payload = fake.respond(body)
+                if payload is None:
+                    self._send(500, {"error": {"message": "Injected fake LLM error", "type": "server_error"}})
+                else:
+                    self._send(200, payload)
+
+            def _send(self, status: int, payload: Dict[str, Any]):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def start_agent_server(
+    llm_base_url: str,
+    db_path: Path,
+    port: int,
+    admission_limits: Optional[str] = None,
+    log_file=subprocess.DEVNULL,
+) -> subprocess.Popen:
+    """Start the FastAPI server in a subprocess pointed at the fake LLM and a scratch database"""
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=llm_base_url,
+        OPENAI_API_KEY="loadtest",
+        AGENT_DB_PATH=str(db_path),
+    )
+    if admission_limits:
+        env["ADMISSION_LIMITS"] = admission_limits
+    backend_dir = Path(__file__).resolve().parent.parent
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir,
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_until_ready(base_url: str, process: Optional[subprocess.Popen] = None, timeout: float = 30.0):
+    """Wait for the server's /health endpoint to answer"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Agent server exited with code {process.returncode}")
+        try:
+            requests.get(f"{base_url}/health", timeout=1)
+            return
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Agent server at {base_url} did not become ready within {timeout}s")
+
+
+def database_size(db_path: Optional[Path]) -> Optional[int]:
+    """Size in bytes of the SQLite database including its journal files"""
+    if db_path is None:
+        return None
+    return sum(
+        path.stat().st_size
+        for path in (db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-journal"))
+        if path.exists()
+    )
+
+
+def run_agent(
+    client: Client,
+    prompt: str,
+    answer: str,
+    poll_interval: float,
+    timeout: float,
+) -> Dict[str, Any]:
+    """Launch one agent, answer its ask_human prompts and poll it to a terminal status"""
+    start = time.monotonic()
+    result = {"id": None, "status": None, "seconds": None, "steps": 0, "human_inputs": 0, "error": None}
+    try:
+        state = client.launch(prompt)
+        result["id"] = state["id"]
+        while True:
+            if state["status"] == "waiting_human_input":
+                state = client.provide_input(state["id"], answer)
+                result["human_inputs"] += 1
+                continue
+            if is_terminal_status(state["status"]):
+                break
+            if time.monotonic() - start > timeout:
+                result["status"] = "timeout"
+                result["error"] = f"Still {state['status']} after {timeout}s"
+                return result
+            time.sleep(poll_interval)
+            state = client.get_state(state["id"])
+    except requests.exceptions.HTTPError as e:
+        status_code = e.response.status_code if e.response is not None else None
+        result["status"] = "rejected" if status_code == 429 else "http_error"
+        result["error"] = str(e)
+        return result
+    except requests.exceptions.RequestException as e:
+        result["status"] = "connection_error"
+        result["error"] = str(e)
+        return result
+
+    result["status"] = state["status"]
+    result["steps"] = state["steps"]
+    result["seconds"] = time.monotonic() - start
+    if state["status"] == "failed":
+        result["error"] = state.get("error")
+    return result
+
+
+def run_load(
+    base_url: str,
+    agents: int,
+    concurrency: int,
+    prompt: str,
+    answer: str,
+    poll_interval: float,
+    timeout: float,
+) -> Dict[str, Any]:
+    """Run `agents` agents with at most `concurrency` in flight and return the raw results and wall time"""
+    local = threading.local()
+
+    def worker(_: int) -> Dict[str, Any]:
+        # requests.Session is not thread-safe, so every worker thread gets its own Client
+        if not hasattr(local, "client"):
+            local.client = Client(base_url)
+        return run_agent(local.client, prompt, answer, poll_interval, timeout)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadtest") as executor:
+        results = list(executor.map(worker, range(agents)))
+    return {"results": results, "wall_seconds": time.monotonic() - start}
+
+
+def build_report(
+    results: List[Dict[str, Any]],
+    wall_seconds: float,
+    db_size_before: Optional[int],
+    db_size_after: Optional[int],
+    llm: Optional[FakeResponsesServer] = None,
+) -> Dict[str, Any]:
+    """Summarize load test results"""
+    statuses = Counter(result["status"] for result in results)
+    finished = [result for result in results if result["seconds"] is not None]
+    completed = [result for result in finished if result["status"] == "complete"]
+    durations = [result["seconds"] for result in finished]
+    errors = [result for result in results if result["status"] != "complete"]
+
+    report = {
+        "agents": len(results),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_per_second": round(len(completed) / wall_seconds, 3) if wall_seconds else None,
+        "statuses": dict(statuses),
+        "error_rate": round(len(errors) / len(results), 4) if results else 0.0,
+        "time_to_complete_seconds": {
+            name: round(value, 3) if value is not None else None
+            for name, value in (
+                ("p50", percentile(durations, 50)),
+                ("p95", percentile(durations, 95)),
+                ("p99", percentile(durations, 99)),
+                ("max", max(durations) if durations else None),
+            )
+        },
+        "steps_total": sum(result["steps"] for result in finished),
+        "human_inputs_total": sum(result["human_inputs"] for result in results),
+        "db_bytes_before": db_size_before,
+        "db_bytes_after": db_size_after,
+        "db_bytes_growth": (db_size_after - db_size_before) if db_size_before is not None and db_size_after is not None else None,
+        "sample_errors": [result["error"] for result in errors if result["error"]][:5],
+    }
+    if report["db_bytes_growth"] is not None and results:
+        report["db_bytes_per_agent"] = round(report["db_bytes_growth"] / len(results))
+    if llm is not None:
+        report["llm_requests"] = llm.requests
+        report["llm_injected_errors"] = llm.errors
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    """Print a human-readable summary of the report"""
+    latency = report["time_to_complete_seconds"]
+    print(f"\nAgents:            {report['agents']} in {report['wall_seconds']}s")
+    print(f"Throughput:        {report['throughput_per_second']} completed runs/s")
+    print(f"Time to complete:  p50={latency['p50']}s p95={latency['p95']}s p99={latency['p99']}s max={latency['max']}s")
+    print(f"Statuses:          {report['statuses']}")
+    print(f"Error rate:        {report['error_rate']:.2%}")
+    print(f"Steps / inputs:    {report['steps_total']} steps, {report['human_inputs_total']} human inputs answered")
+    if report["db_bytes_growth"] is not None:
+        print(
+            f"Database:          {report['db_bytes_before']} -> {report['db_bytes_after']} bytes "
+            f"(+{report['db_bytes_growth']}, ~{report.get('db_bytes_per_agent')} per agent)"
+        )
+    if "llm_requests" in report:
+        print(f"Fake LLM:          {report['llm_requests']} requests, {report['llm_injected_errors']} injected errors")
+    for error in report["sample_errors"]:
+        print(f"  error: {error}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for `python -m client.loadtest`; returns a non-zero exit code when thresholds are missed"""
+    parser = argparse.ArgumentParser(description="Load test the agent server against a fake local LLM")
+    parser.add_argument("--agents", type=int, default=100, help="Number of agents to launch")
+    parser.add_argument("--concurrency", type=int, default=None, help="Agents in flight at once (default: all)")
+    parser.add_argument("--latency", default="lognormal:0.3,0.5", help="Fake LLM latency distribution, e.g. fixed:0.1, uniform:0.05,0.5, normal:0.3,0.1, lognormal:0.3,0.5, exponential:0.3")
+    parser.add_argument("--script", type=Path, default=None, help="JSON file with a list of turns, each a list of {name, arguments} function calls")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of fake LLM requests answered with HTTP 500")
+    parser.add_argument("--llm-port", type=int, default=0, help="Port of the fake LLM server (default: any free port)")
+    parser.add_argument("--server-url", default=None, help="Target an already running server instead of starting one (start it with OPENAI_BASE_URL pointing at the fake LLM)")
+    parser.add_argument("--server-port", type=int, default=8765, help="Port for the server started by the load test")
+    parser.add_argument("--db-path", type=Path, default=None, help="Database to measure (default: a scratch database for the started server)")
+    parser.add_argument("--server-log", type=Path, default=None, help="Write the started server's log to this file (default: discard)")
+    parser.add_argument("--admission-limits", default=None, help="ADMISSION_LIMITS JSON passed to the started server")
+    parser.add_argument("--prompt", default="Solve the roots of this equation: x^2 - 5x + 6 = 0", help="Prompt sent to every agent")
+    parser.add_argument("--answer", default="Yes, report all of them.", help="Answer given to every ask_human prompt")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="Seconds between state polls per agent")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds before an agent counts as timed out")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="Exit with code 1 if the error rate is higher")
+    parser.add_argument("--max-p95", type=float, default=None, help="Exit with code 1 if p95 time to complete (seconds) is higher")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    script = json.loads(args.script.read_text()) if args.script else None
+    llm = FakeResponsesServer(script=script, latency=parse_latency(args.latency), error_rate=args.llm_error_rate, port=args.llm_port)
+    llm_base_url = llm.start()
+
+    server = None
+    server_log = None
+    scratch_dir = None
+    db_path = args.db_path
+    try:
+        if args.server_url:
+            base_url = args.server_url.rstrip("/")
+            print(f"Fake LLM listening at {llm_base_url}; expecting the server at {base_url} to use it")
+        else:
+            if db_path is None:
+                scratch_dir = tempfile.TemporaryDirectory(prefix="agent-loadtest-")
+                db_path = Path(scratch_dir.name) / "agent_states.db"
+            base_url = f"http://127.0.0.1:{args.server_port}"
+            server_log = open(args.server_log, "a") if args.server_log else None
+            server = start_agent_server(
+                llm_base_url, db_path, args.server_port, args.admission_limits, server_log or subprocess.DEVNULL
+            )
+        wait_until_ready(base_url, server)
+
+        db_size_before = database_size(db_path)
+        load = run_load(
+            base_url,
+            agents=args.agents,
+            concurrency=args.concurrency or args.agents,
+            prompt=args.prompt,
+            answer=args.answer,
+            poll_interval=args.poll_interval,
+            timeout=args.timeout,
+        )
+        report = build_report(load["results"], load["wall_seconds"], db_size_before, database_size(db_path), llm)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if server_log is not None:
+            server_log.close()
+        llm.stop()
+        if scratch_dir is not None:
+            scratch_dir.cleanup()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    failures = []
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {report['error_rate']:.2%} is above {args.max_error_rate:.2%}")
+    p95 = report["time_to_complete_seconds"]["p95"]
+    if args.max_p95 is not None and (p95 is None or p95 > args.max_p95):
+        failures.append(f"p95 time to complete {p95}s is above {args.max_p95}s")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import json
 import requests
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from core.tools.human_interaction import ask_human_cli
 
@@ -9,32 +9,49 @@ from core.tools.human_interaction import ask_human_cli
 class Client:
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
+        # Reuse pooled keep-alive connections across calls
+        self.session = requests.Session()
 
-    def launch(self, input_prompt: str) -> Dict[str, Any]:
-        """Launch a new agent and return the initial state"""
+    def launch(self, input_prompt: str, idempotency_key: Optional[str] = None, dedup: bool = False) -> Dict[str, Any]:
+        """Launch a new agent and return the initial state (retries with the same idempotency_key return the same run)"""
         url = f"{self.base_url}/agent/launch"
-        response = requests.post(url, json={"input_prompt": input_prompt})
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        response = self.session.post(url, json={"input_prompt": input_prompt, "dedup": dedup}, headers=headers)
         response.raise_for_status()
         return response.json()
 
     def resume(self, state_id: str) -> Dict[str, Any]:
         """Resume a paused agent by its state ID"""
         url = f"{self.base_url}/agent/resume"
-        response = requests.post(url, json={"id": state_id})
+        response = self.session.post(url, json={"id": state_id})
         response.raise_for_status()
         return response.json()
 
     def get_state(self, state_id: str) -> Dict[str, Any]:
         """Get the current state of an agent by its ID"""
         url = f"{self.base_url}/agent/state/{state_id}"
-        response = requests.get(url)
+        response = self.session.get(url)
         response.raise_for_status()
         return response.json()
 
     def provide_input(self, state_id: str, answer: str) -> Dict[str, Any]:
         """Provide human input to a state waiting for human input"""
         url = f"{self.base_url}/agent/provide_input"
-        response = requests.post(url, json={"id": state_id, "answer": answer})
+        response = self.session.post(url, json={"id": state_id, "answer": answer})
+        response.raise_for_status()
+        return response.json()
+
+    def get_states(self, state_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get the current state of many agents in one request"""
+        url = f"{self.base_url}/agent/states"
+        response = self.session.get(url, params={"ids": ",".join(state_ids)})
+        response.raise_for_status()
+        return response.json()
+
+    def get_state_summaries(self, state_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get id, status, steps, final_answer, error and pending question of many agents (no context)"""
+        url = f"{self.base_url}/agent/states/summary"
+        response = self.session.get(url, params={"ids": ",".join(state_ids)})
         response.raise_for_status()
         return response.json()
 
@@ -51,7 +68,7 @@ class Client:
 
 def is_terminal_status(status: str) -> bool:
     """Check if a status indicates the agent has finished"""
-    return status in ("complete", "failed", "max_steps_reached")
+    return status in ("complete", "failed", "max_steps_reached", "budget_exceeded")
 
 
 def handle_human_input(client: Client, state_id: str, current_state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
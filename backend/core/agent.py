@@ -1,10 +1,18 @@
+import cProfile
+import hashlib
 import json
-import openai
-from typing import List, Any, Optional
+import pstats
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Any, Optional
 from pathlib import Path
 
 from core.models.state import State
 from core.client_tool import ClientTool
+from core.llm import LLMBackend, default_backend
+from core.tracing import Tracer
+from core.usage import add_usage, empty_usage, estimate_cost, extract_usage, total_tokens
 
 class Agent:
     def __init__(
@@ -13,13 +21,42 @@ class Agent:
         reasoning_effort: str = "low",
         extra_instructions: str = "None",
         max_steps: int = 10,
-        tools: Optional[List[ClientTool]] = None
+        tools: Optional[List[ClientTool]] = None,
+        response_cache: Optional[Any] = None,
+        backend: Optional[LLMBackend] = None,
+        token_budget: Optional[int] = None,
+        cost_budget: Optional[float] = None,
+        pricing: Optional[dict] = None,
+        max_subagent_concurrency: int = 4,
+        max_subagent_depth: int = 1,
+        state_loader: Optional[Callable[[str], Optional[State]]] = None,
+        tracer: Optional[Tracer] = None,
+        profile_sample_rate: float = 0.0
     ):
         self.model = model
         self.reasoning_effort = reasoning_effort
         prompt_path = Path(__file__).resolve().parent / "prompts" / "base_system.md"
         self.system_prompt = prompt_path.read_text(encoding="utf-8") + extra_instructions
         self.max_steps = max_steps
+        # LLM transport; defaults to the shared pooled OpenAI backend
+        self.backend = backend or default_backend()
+        # Optional cache with get(key)/set(key, value), used by forks to reuse the LLM
+        # responses their lineage already received for the shared context prefix
+        self.response_cache = response_cache
+        # Default per-run budgets (input + output tokens, USD); a state's own budgets take precedence
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.pricing = pricing
+        # Sub-agent fan-out: how many children run at once, how deep spawning may nest, and
+        # an optional loader used to pick up existing children when a paused parent resumes.
+        # Children run on a thread pool owned by the parent's run, not through server admission control
+        self.max_subagent_concurrency = max_subagent_concurrency
+        self.max_subagent_depth = max_subagent_depth
+        self.state_loader = state_loader
+        # Optional tracing hooks (every call site checks for None, so disabled tracing costs nothing)
+        # and the fraction of runs whose agent loop is profiled with cProfile
+        self.tracer = tracer
+        self.profile_sample_rate = profile_sample_rate
         # Map tools by name for quick lookup and prepare tool schemas for the LLM
         tools = tools or []
         self.tools = {tool.name: tool for tool in tools}
@@ -52,17 +89,108 @@ class Agent:
                 "additionalProperties": False
             }
         })
+        # Built-in tool: spawn_subagents
+        self.tool_schemas.append({
+            "type": "function",
+            "name": "spawn_subagents",
+            "description": "Split the work into independent sub-tasks that are solved concurrently by sub-agents. Returns each sub-agent's final answer. Sub-agents cannot ask the user, so each task must include everything needed to solve it.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "tasks": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Self-contained descriptions of the sub-tasks"
+                    }
+                },
+                "required": ["tasks"],
+                "additionalProperties": False
+            }
+        })
+        # Sub-agents run unattended: nothing routes a question of theirs to the user
+        self.subagent_tool_schemas = [schema for schema in self.tool_schemas if schema["name"] != "ask_human"]
 
-    def _call_llm(self, context: List[Any]):
-        response = openai.responses.create(
+    def _tool_schemas_for(self, state: State) -> List[dict]:
+        return self.subagent_tool_schemas if state.spawned_by else self.tool_schemas
+
+    def _call_llm(self, context: List[Any], tool_schemas: List[dict]):
+        response = self.backend.create_response(
             model=self.model,
             instructions=self.system_prompt,
             input=context,
-            tools=self.tool_schemas,
+            tools=tool_schemas,
             reasoning={"effort": self.reasoning_effort} if self.model == "gpt-5" else None
         )
         return response
 
+    def config_fingerprint(self) -> str:
+        """Hash of everything about this agent that influences a run's outcome"""
+        payload = json.dumps(
+            {
+                "backend": self.backend.name,
+                "model": self.model,
+                "reasoning_effort": self.reasoning_effort,
+                "instructions": self.system_prompt,
+                "tools": self.tool_schemas,
+                "max_steps": self.max_steps,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_key(self, context: List[Any], cache_scope: str, tool_schemas: List[dict]) -> str:
+        payload = json.dumps(
+            {
+                "scope": cache_scope,
+                "backend": self.backend.name,
+                "model": self.model,
+                "reasoning_effort": self.reasoning_effort,
+                "instructions": self.system_prompt,
+                "tools": tool_schemas,
+                "input": context,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _get_function_calls(self, context: List[Any], cache_scope: Optional[str] = None, tool_schemas: Optional[List[dict]] = None):
+        """Return the function calls for this context and the token usage spent producing them"""
+        # Serve from the response cache when this exact context was seen before in the same
+        # fork lineage (no tokens spent); separate runs never share responses
+        tool_schemas = self.tool_schemas if tool_schemas is None else tool_schemas
+        cache_key = (
+            self._cache_key(context, cache_scope, tool_schemas)
+            if self.response_cache is not None and cache_scope is not None
+            else None
+        )
+        if cache_key is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached, empty_usage(), True
+
+        response = self._call_llm(context, tool_schemas)
+
+        # Find all tool calls and convert SDK objects to plain dicts for storage
+        function_calls = [item for item in response.output if item.type == "function_call"]
+        function_call_dicts = [
+            {
+                "name": fc.name,
+                "arguments": json.loads(fc.arguments),  # Parse once, store as dict
+                "call_id": fc.call_id,
+                "type": fc.type,
+            }
+            for fc in function_calls
+        ]
+
+        if cache_key is not None:
+            self.response_cache.set(cache_key, function_call_dicts)
+
+        usage = extract_usage(response)
+        usage["cost_usd"] = estimate_cost(self.model, usage, self.pricing)
+        return function_call_dicts, usage, False
+
     def _call_tool(self, function_call):
         # Get tool name, id and input (handle both dict and object)
         tool_name = function_call["name"]
@@ -79,7 +207,55 @@ class Agent:
             result = f"Error: {str(e)}"
         return {"type": "function_call_output", "call_id": call_id, "output": json.dumps({"result": result})}
 
-    def _next_step(self, state: State):
+    def _run_subagent(self, child: State, progress_callback=None) -> State:
+        try:
+            child = self.run(child, progress_callback=progress_callback)
+            # run() settles max_steps_reached / budget_exceeded after its last progress callback,
+            # and nothing else saves a child's final state
+            if progress_callback:
+                progress_callback(child)
+            return child
+        except Exception as e:
+            child.status = "failed"
+            child.error = str(e)
+            child.pending_tool_calls = []
+            if progress_callback:
+                progress_callback(child)
+            return child
+
+    def _spawn_subagents(self, state: State, function_call: dict, progress_callback=None) -> List[State]:
+        """Create (or reload) one child state per sub-task and run them concurrently"""
+        tasks = function_call["arguments"].get("tasks") or []
+        children = []
+        for index, task in enumerate(tasks):
+            # Children created before a pause are picked up again instead of starting over
+            child_ids = function_call.get("child_ids") or []
+            child = self.state_loader(child_ids[index]) if self.state_loader and index < len(child_ids) else None
+            if child is None:
+                child = State(
+                    id=str(uuid.uuid4()),
+                    context=[{"role": "user", "content": task}],
+                    spawned_by=state.id,
+                    depth=state.depth + 1,
+                )
+                # Persist the child (and its link to the parent) before it starts running
+                if progress_callback:
+                    progress_callback(child)
+            children.append(child)
+        function_call["child_ids"] = [child.id for child in children]
+
+        # Run new children and ones that were paused (or interrupted) before finishing
+        runnable = [child for child in children if child.status in ("running", "paused")]
+        if runnable:
+            with ThreadPoolExecutor(max_workers=max(1, self.max_subagent_concurrency)) as executor:
+                finished = {
+                    child.id: child
+                    for child in executor.map(lambda c: self._run_subagent(c, progress_callback), runnable)
+                }
+            children = [finished.get(child.id, child) for child in children]
+        return children
+
+    def _next_step(self, state: State, progress_callback=None):
         # Increment step
         state.steps = state.steps + 1
 
@@ -102,6 +278,15 @@ class Agent:
 
             # If called ask_human tool
             if call_name == "ask_human":
+                # Sub-agents are not offered ask_human; one that calls it anyway has to carry on alone
+                if state.spawned_by:
+                    state.pending_tool_calls.remove(function_call)
+                    state.context.append({
+                        "type": "function_call_output",
+                        "call_id": call_id,
+                        "output": json.dumps({"result": "Error: Sub-agents cannot ask the user; solve the task with the information given"}),
+                    })
+                    continue
                 # Remove this tool call from state.pending_tool_calls
                 state.pending_tool_calls.remove(function_call)
                 # Set state.status to waiting_human_input
@@ -120,40 +305,130 @@ class Agent:
                 # Return state
                 return state
 
+            # If called spawn_subagents tool
+            if call_name == "spawn_subagents":
+                if state.depth >= self.max_subagent_depth:
+                    result = {
+                        "type": "function_call_output",
+                        "call_id": call_id,
+                        "output": json.dumps({"result": "Error: Sub-agents cannot spawn further sub-agents"}),
+                    }
+                else:
+                    if self.tracer:
+                        self.tracer.on_tool_start(state, function_call)
+                    children = self._spawn_subagents(state, function_call, progress_callback)
+                    # A paused child pauses the parent; the call stays pending so resume picks it up
+                    if any(child.status == "paused" for child in children):
+                        if self.tracer:
+                            # Close the span; resuming opens a new one for the same call
+                            self.tracer.on_tool_end(state, function_call, {"type": "function_call_output", "call_id": call_id, "output": ""})
+                        state.context.pop()
+                        state.status = "paused"
+                        return state
+                    answers = [
+                        {
+                            "task": child.context[0]["content"],
+                            "id": child.id,
+                            "status": child.status,
+                            "answer": child.final_answer,
+                            "error": child.error,
+                        }
+                        for child in children
+                    ]
+                    result = {
+                        "type": "function_call_output",
+                        "call_id": call_id,
+                        "output": json.dumps({"result": answers}),
+                    }
+                    if self.tracer:
+                        self.tracer.on_tool_end(state, function_call, result)
+                state.pending_tool_calls.remove(function_call)
+                state.context.append(result)
+                continue
+
             # Call the regular tool (convert to dict format)
             tool_call_dict = {
                 "name": call_name,
                 "arguments": call_arguments,
                 "call_id": call_id
             }
+            if self.tracer:
+                self.tracer.on_tool_start(state, tool_call_dict)
             result = self._call_tool(tool_call_dict)
+            if self.tracer:
+                self.tracer.on_tool_end(state, tool_call_dict, result)
             # Remove this tool call from state.pending_tool_calls
             state.pending_tool_calls.remove(function_call)
             # Add the tool result to state.context
             state.context.append(result)
 
-        # Call LLM
-        response = self._call_llm(state.context)
+        # Call LLM (or reuse a cached response for this context)
+        if self.tracer:
+            self.tracer.on_llm_start(state, state.context)
+        function_call_dicts, usage, cached = self._get_function_calls(
+            state.context, state.lineage_id or state.id, self._tool_schemas_for(state)
+        )
+        if self.tracer:
+            self.tracer.on_llm_end(state, function_call_dicts, usage, cached)
 
-        # Find all tool calls and convert to dicts for JSON serialization
-        function_calls = [item for item in response.output if item.type == "function_call"]
-        
-        # Convert SDK objects to plain dicts for storage
-        function_call_dicts = [
-            {
-                "name": fc.name,
-                "arguments": json.loads(fc.arguments),  # Parse once, store as dict
-                "call_id": fc.call_id,
-                "type": fc.type,
-            }
-            for fc in function_calls
-        ]
+        # Record token usage for this step and the run totals
+        state.step_usage.append({"step": state.steps, **usage})
+        state.usage = add_usage(state.usage, usage)
 
         # Add new tool calls to state.pending_tool_calls
         state.pending_tool_calls.extend(function_call_dicts)
 
         return state
-                
+
+    def _record_checkpoint(self, state: State):
+        # Remember where each step ended so a run can later be forked from it
+        checkpoint = {
+            "step": state.steps,
+            "context_length": len(state.context),
+            "pending_tool_calls": [dict(call) for call in state.pending_tool_calls],
+            "status": state.status,
+        }
+        state.checkpoints.append(checkpoint)
+        if self.tracer:
+            self.tracer.on_checkpoint(state, checkpoint)
+
+    def _start_profiler(self) -> Optional[cProfile.Profile]:
+        # Profile only a sampled fraction of runs, and only when a tracer is there to receive the stats
+        if not self.tracer or not self.profile_sample_rate or random.random() >= self.profile_sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return None
+        return profiler
+
+    def _finish_profiler(self, profiler: cProfile.Profile, state: State, limit: int = 25):
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        top_functions = [
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "total_seconds": round(total_time, 6),
+                "cumulative_seconds": round(cumulative_time, 6),
+            }
+            for (filename, line, name), (_, calls, total_time, cumulative_time, _) in
+            sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        ]
+        if self.tracer:
+            self.tracer.on_profile(state, top_functions)
+
+    def _budget_exceeded(self, state: State) -> bool:
+        token_budget = state.token_budget if state.token_budget is not None else self.token_budget
+        cost_budget = state.cost_budget if state.cost_budget is not None else self.cost_budget
+        if token_budget is not None and total_tokens(state.usage) >= token_budget:
+            return True
+        if cost_budget is not None and state.usage.get("cost_usd", 0.0) >= cost_budget:
+            return True
+        return False
+
     def run(self, state: State, progress_callback=None):
         """
         Execute agent steps on a given state.
@@ -171,15 +446,40 @@ class Agent:
         is_resuming = state.steps > 0
         max_steps_allowed = (self.max_steps + state.steps) if is_resuming else self.max_steps
 
-        # Call next step until complete or waiting_human_input
-        while state.status == "running" and state.steps < max_steps_allowed:
-            state = self._next_step(state)
-            # Call progress callback if provided
-            if progress_callback:
-                progress_callback(state)
+        # Record the initial context as step 0 so forks can start from the very beginning
+        if not state.checkpoints and state.steps == 0:
+            self._record_checkpoint(state)
+
+        # A run that already spent its budget doesn't get another LLM call
+        if self._budget_exceeded(state):
+            state.status = "budget_exceeded"
+
+        profiler = self._start_profiler()
+
+        # The profiler must not outlive the run on this (pooled) thread, and the spans of a run
+        # that raised are the ones most worth keeping
+        try:
+            # Call next step until complete, waiting_human_input or out of budget
+            while state.status == "running" and state.steps < max_steps_allowed:
+                if self.tracer:
+                    self.tracer.on_step_start(state)
+                state = self._next_step(state, progress_callback)
+                if self.tracer:
+                    self.tracer.on_step_end(state)
+                self._record_checkpoint(state)
+                if state.status == "running" and self._budget_exceeded(state):
+                    state.status = "budget_exceeded"
+                # Call progress callback if provided
+                if progress_callback:
+                    progress_callback(state)
+
+            # If still running and max steps reached, set status to max_steps_reached
+            if state.status == "running" and state.steps >= max_steps_allowed:
+                state.status = "max_steps_reached"
+        finally:
+            if profiler:
+                self._finish_profiler(profiler, state)
+            if self.tracer:
+                self.tracer.on_run_end(state)
 
-        # If still running and max steps reached, set status to max_steps_reached
-        if state.status == "running" and state.steps >= max_steps_allowed:
-            state.status = "max_steps_reached"
-        
         return state
\ No newline at end of file
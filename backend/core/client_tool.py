@@ -1,14 +1,16 @@
 import inspect
 import json
-from typing import get_origin, get_type_hints
+from typing import Optional, get_origin, get_type_hints
 
 
 class ClientTool:
-    def __init__(self, name: str, description: str, function, require_approval: bool = False):
+    def __init__(self, name: str, description: str, function, require_approval: bool = False, parameters: Optional[dict] = None):
         self.name = name
         self.description = description
         self.function = function
         self.require_approval = require_approval
+        # Explicit JSON schema for the arguments, for tools whose signature can't describe them
+        self.parameters = parameters
         self.schema = self._generate_schema()
 
     def execute(self, **kwargs):
@@ -21,9 +23,19 @@ class ClientTool:
                 approved = False
             if not approved:
                 raise PermissionError("Execution not approved by user")
+        # Optional arguments are sent as null when unused; let the function's default apply
+        defaults = {
+            name for name, param in inspect.signature(self.function).parameters.items()
+            if param.default is not inspect.Parameter.empty
+        }
+        kwargs = {key: value for key, value in kwargs.items() if value is not None or key not in defaults}
         return self.function(**kwargs)
 
     def _generate_schema(self):
+        # Schemas follow the Responses API's strict mode (the default for function tools): every
+        # property is required, optional ones are nullable, and objects allow no other properties
+        if self.parameters is not None:
+            return {"type": "function", "name": self.name, "description": self.description, "parameters": self.parameters}
         signature = inspect.signature(self.function)
         annotations = get_type_hints(self.function)
         type_map = {
@@ -45,9 +57,11 @@ class ClientTool:
             origin = get_origin(annotation)
             base = origin or annotation
             json_type = type_map.get(base, "string")
-            properties[param_name] = {"type": json_type}
             if param.default == inspect.Parameter.empty:
-                required.append(param_name)
+                properties[param_name] = {"type": json_type}
+            else:
+                properties[param_name] = {"type": [json_type, "null"]}
+            required.append(param_name)
         return {
             "type": "function",
             "name": self.name,
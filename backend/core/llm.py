@@ -0,0 +1,183 @@
+import json
+import threading
+from abc import ABC, abstractmethod
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import openai
+
+
+class LLMBackend(ABC):
+    """Interface for anything that can produce a Responses API style result for the agent"""
+    name = "base"
+
+    @abstractmethod
+    def create_response(self, model: str, instructions: str, input: List[Any], tools: List[dict], reasoning: Optional[dict] = None):
+        """Return an object whose `output` is a list of items with `type`, `name`, `arguments` and `call_id`"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend usage statistics"""
+        return {"backend": self.name}
+
+    def close(self):
+        """Release any resources held by the backend"""
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    """HTTP transport that counts requests and the connections opened to serve them"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+
+    def handle_request(self, request):
+        # httpcore reports connection setup through the public "trace" request extension
+        previous_trace = request.extensions.get("trace")
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.connections_opened += 1
+            if previous_trace is not None:
+                previous_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        response = super().handle_request(request)
+        with self._lock:
+            self.requests += 1
+        return response
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI Responses API backend sharing one pooled, keep-alive HTTP client across all agents"""
+    name = "openai"
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 120.0,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2  # Requires the optional `h2` package (pip install httpx[http2])
+        self.timeout = timeout
+        self._client = None
+        self._transport = None
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> openai.OpenAI:
+        # Created lazily so the server can start without an API key configured
+        with self._lock:
+            if self._client is None:
+                self._transport = _CountingTransport(http2=self.http2, limits=self.limits)
+                http_client = httpx.Client(transport=self._transport, timeout=self.timeout)
+                # The SDK sends its own (600s) timeout with every request unless given one explicitly
+                self._client = openai.OpenAI(
+                    api_key=self.api_key, base_url=self.base_url, http_client=http_client, timeout=self.timeout
+                )
+            return self._client
+
+    def create_response(self, model: str, instructions: str, input: List[Any], tools: List[dict], reasoning: Optional[dict] = None):
+        return self._get_client().responses.create(
+            model=model,
+            instructions=instructions,
+            input=input,
+            tools=tools,
+            reasoning=reasoning,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        transport = self._transport
+        requests = transport.requests if transport else 0
+        connections_opened = transport.connections_opened if transport else 0
+        return {
+            "backend": self.name,
+            "requests": requests,
+            "connections_opened": connections_opened,
+            "connection_reuse_ratio": (1 - connections_opened / requests) if requests else 0.0,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "http2": self.http2,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+                self._transport = None
+
+
+class LocalBackend(LLMBackend):
+    """Deterministic offline backend for tests: function calls are produced by a responder callable"""
+    name = "local"
+
+    def __init__(self, responder: Optional[Callable[[List[Any]], List[dict]]] = None, latency: float = 0.0):
+        # responder(context) returns a list of {"name": ..., "arguments": {...}} dicts
+        self.responder = responder or self._final_answer_responder
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    @staticmethod
+    def _final_answer_responder(context: List[Any]) -> List[dict]:
+        # Answer immediately with the latest user message
+        prompt = next(
+            (item.get("content") for item in reversed(context) if isinstance(item, dict) and item.get("role") == "user"),
+            "",
+        )
+        return [{"name": "final_answer", "arguments": {"answer": str(prompt)}}]
+
+    def create_response(self, model: str, instructions: str, input: List[Any], tools: List[dict], reasoning: Optional[dict] = None):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        output = [
+            SimpleNamespace(
+                type="function_call",
+                name=call["name"],
+                arguments=json.dumps(call.get("arguments", {})),
+                # Derive call ids from the context position so runs are reproducible
+                call_id=call.get("call_id") or f"local_{len(input)}_{index}",
+            )
+            for index, call in enumerate(self.responder(input))
+        ]
+        # Rough, deterministic token counts (~4 characters per token)
+        usage = SimpleNamespace(
+            input_tokens=len(json.dumps(input, default=str)) // 4,
+            output_tokens=sum(len(item.name) + len(item.arguments) for item in output) // 4,
+            input_tokens_details=SimpleNamespace(cached_tokens=0),
+            output_tokens_details=SimpleNamespace(reasoning_tokens=0),
+        )
+        return SimpleNamespace(output=output, usage=usage)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "requests": self.requests}
+
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+
+def default_backend() -> LLMBackend:
+    """Return the process-wide OpenAI backend shared by agents that don't specify one"""
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = OpenAIBackend()
+        return _default_backend
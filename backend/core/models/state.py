@@ -1,6 +1,8 @@
-from typing import List, Any, Optional
+from typing import List, Any, Dict, Optional
 from pydantic import BaseModel, Field
 
+from core.usage import empty_usage
+
 
 class State(BaseModel):
     id: str
@@ -9,4 +11,22 @@ class State(BaseModel):
     context: List[Any] = Field(default_factory=list)
     pending_tool_calls: List[Any] = Field(default_factory=list)
     error: Optional[str] = None
-    final_answer: Optional[str] = None
\ No newline at end of file
+    final_answer: Optional[str] = None
+    # Fork lineage: the first fork_index context items are inherited from parent_id
+    parent_id: Optional[str] = None
+    fork_index: int = 0
+    # Root run of the fork lineage (None for a root run); cached LLM responses are shared within a lineage only
+    lineage_id: Optional[str] = None
+    # Sub-agent lineage: the state whose spawn_subagents call created this one, and nesting depth
+    spawned_by: Optional[str] = None
+    depth: int = 0
+    # One entry per step: {"step", "context_length", "pending_tool_calls", "status"}
+    checkpoints: List[Any] = Field(default_factory=list)
+    # Token usage: one record per LLM call ({"step", token counts, "cost_usd"}) and run totals
+    step_usage: List[Any] = Field(default_factory=list)
+    usage: Dict[str, Any] = Field(default_factory=empty_usage)
+    # Admission priority class used whenever this run is (re)started
+    priority: str = "normal"
+    # Per-run budgets; None falls back to the agent's defaults
+    token_budget: Optional[int] = None
+    cost_budget: Optional[float] = None
@@ -1,3 +1,10 @@
+import ast
+import math
+import operator
+import time
+from typing import List, Optional, Union
+
+
 def sum_numbers(a: float, b: float) -> float:
     return a + b
 
@@ -26,3 +33,255 @@ def square_root(x: float) -> float:
     return x ** 0.5
 
 
+# Limits for evaluate_expression
+MAX_EXPRESSION_LENGTH = 2000
+MAX_NODES = 500
+MAX_VECTOR_LENGTH = 10000
+MAX_TOTAL_ELEMENTS = 100000
+MAX_MAGNITUDE = 1e100
+MAX_EXPONENT = 1000
+MAX_FACTORIAL = 170
+TIME_LIMIT_SECONDS = 1.0
+
+EVALUATE_EXPRESSION_DESCRIPTION = (
+    "Evaluate a math expression in one step, e.g. \"(-b + sqrt(b**2 - 4*a*c)) / (2*a)\". "
+    "Supports + - * / // % ** (or ^), pi, e, math functions (sqrt, exp, log, sin, ...), and sum/min/max/mean. "
+    "Variables given as arrays are evaluated element-wise; a [x, y] list returns several results at once. "
+    "Pass variables as a list of {\"name\": ..., \"value\": ...} pairs whose value is a number or an array of numbers, "
+    "e.g. [{\"name\": \"x\", \"value\": [1, 2, 3]}], or null when the expression has none."
+)
+
+_VARIABLE_VALUE_SCHEMA = {"anyOf": [{"type": "number"}, {"type": "array", "items": {"type": "number"}}]}
+
+# Explicit argument schema: the signature's `variables` dict has no strict-mode equivalent
+EVALUATE_EXPRESSION_PARAMETERS = {
+    "type": "object",
+    "properties": {
+        "expression": {"type": "string", "description": "The expression to evaluate"},
+        "variables": {
+            "type": ["array", "null"],
+            "description": "Values of the names used in the expression, or null",
+            "items": {
+                "type": "object",
+                "properties": {"name": {"type": "string"}, "value": _VARIABLE_VALUE_SCHEMA},
+                "required": ["name", "value"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["expression", "variables"],
+    "additionalProperties": False,
+}
+
+
+def _check_power(base, exponent):
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"Exponent larger than {MAX_EXPONENT}")
+    if abs(base) > 1 and exponent > 0 and exponent * math.log10(abs(base)) > math.log10(MAX_MAGNITUDE):
+        raise ValueError("Result is not a finite real number within the allowed magnitude")
+
+
+def _checked_power(base, exponent):
+    _check_power(base, exponent)
+    return operator.pow(base, exponent)
+
+
+def _checked_division(division):
+    def divide(a, b):
+        if b == 0:
+            raise ValueError("Division by zero")
+        return division(a, b)
+    return divide
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: _checked_division(operator.truediv),
+    ast.FloorDiv: _checked_division(operator.floordiv),
+    ast.Mod: _checked_division(operator.mod),
+    ast.Pow: _checked_power,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+
+def _factorial(x):
+    if x != int(x) or x < 0 or x > MAX_FACTORIAL:
+        raise ValueError(f"factorial() requires an integer between 0 and {MAX_FACTORIAL}")
+    return math.factorial(int(x))
+
+
+# Element-wise functions (applied to every element of array arguments)
+_FUNCTIONS = {
+    "sqrt": math.sqrt,
+    "cbrt": lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    "exp": math.exp,
+    "log": math.log,
+    "log10": math.log10,
+    "log2": math.log2,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "atan2": math.atan2,
+    "sinh": math.sinh,
+    "cosh": math.cosh,
+    "tanh": math.tanh,
+    "hypot": math.hypot,
+    "degrees": math.degrees,
+    "radians": math.radians,
+    "abs": abs,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "round": round,
+    "factorial": _factorial,
+}
+
+# Reductions over an array argument (or over several scalar arguments)
+_REDUCTIONS = {
+    "sum": sum,
+    "min": min,
+    "max": max,
+    "mean": lambda values: sum(values) / len(values),
+}
+
+
+def _check_magnitude(value):
+    if isinstance(value, list):
+        return value
+    if isinstance(value, complex) or math.isnan(value) or abs(value) > MAX_MAGNITUDE:
+        raise ValueError("Result is not a finite real number within the allowed magnitude")
+    return value
+
+
+class _ElementCounter:
+    # Counts array elements (nested ones included) against MAX_TOTAL_ELEMENTS
+    def __init__(self):
+        self.total = 0
+
+    def add(self, count: int):
+        self.total += count
+        if self.total > MAX_TOTAL_ELEMENTS:
+            raise ValueError(f"Arrays are limited to {MAX_TOTAL_ELEMENTS} elements in total")
+
+    def add_value(self, value):
+        # Walks the value but stops as soon as the limit is exceeded, so the work stays bounded
+        stack = [value]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                self.add(len(item))
+                stack.extend(item)
+
+
+def _to_value(value, name, counter: _ElementCounter):
+    if isinstance(value, bool) or not isinstance(value, (int, float, list, tuple)):
+        raise ValueError(f"Variable '{name}' must be a number or an array of numbers")
+    if isinstance(value, (list, tuple)):
+        if len(value) > MAX_VECTOR_LENGTH:
+            raise ValueError(f"Arrays are limited to {MAX_VECTOR_LENGTH} elements")
+        counter.add(len(value))
+        return [_to_value(item, name, counter) for item in value]
+    return _check_magnitude(value)
+
+
+class _Evaluator:
+    def __init__(self, variables: dict, deadline: float):
+        self.variables = variables
+        self.deadline = deadline
+
+    def _check_deadline(self):
+        if time.monotonic() > self.deadline:
+            raise ValueError(f"Evaluation exceeded the {TIME_LIMIT_SECONDS}s time limit")
+
+    def _broadcast(self, function, *args):
+        # NumPy-style element-wise application: scalars combine with every element of an array
+        self._check_deadline()
+        lengths = {len(arg) for arg in args if isinstance(arg, list)}
+        if not lengths:
+            return _check_magnitude(function(*args))
+        if len(lengths) > 1:
+            raise ValueError("Arrays in an element-wise operation must have the same length")
+        length = lengths.pop()
+        return [
+            self._broadcast(function, *(arg[i] if isinstance(arg, list) else arg for arg in args))
+            for i in range(length)
+        ]
+
+    def eval(self, node):
+        self._check_deadline()
+
+        if isinstance(node, ast.Expression):
+            return self.eval(node.body)
+
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError(f"Unsupported constant: {node.value!r}")
+            return _check_magnitude(node.value)
+
+        if isinstance(node, ast.Name):
+            if node.id in self.variables:
+                return self.variables[node.id]
+            if node.id in _CONSTANTS:
+                return _CONSTANTS[node.id]
+            raise ValueError(f"Unknown name: {node.id}")
+
+        if isinstance(node, (ast.List, ast.Tuple)):
+            if len(node.elts) > MAX_VECTOR_LENGTH:
+                raise ValueError(f"Arrays are limited to {MAX_VECTOR_LENGTH} elements")
+            values = [self.eval(element) for element in node.elts]
+            # A literal can repeat array variables ([x, x, ...]), so count what it actually holds
+            _ElementCounter().add_value(values)
+            return values
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            return self._broadcast(_BINARY_OPERATORS[type(node.op)], self.eval(node.left), self.eval(node.right))
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            return self._broadcast(_UNARY_OPERATORS[type(node.op)], self.eval(node.operand))
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name not in _REDUCTIONS and name not in _FUNCTIONS:
+                raise ValueError(f"Unknown function: {name}")
+            args = [self.eval(arg) for arg in node.args]
+            if name in _REDUCTIONS:
+                values = args[0] if len(args) == 1 and isinstance(args[0], list) else args
+                if not values or any(isinstance(value, list) for value in values):
+                    raise ValueError(f"{name}() expects one flat array or several numbers")
+                return _check_magnitude(_REDUCTIONS[name](values))
+            return self._broadcast(_FUNCTIONS[name], *args)
+
+        raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+
+
+def evaluate_expression(expression: str, variables: Optional[Union[dict, List[dict]]] = None):
+    if isinstance(variables, list):
+        # Tool calls pass [{"name": ..., "value": ...}] pairs (see EVALUATE_EXPRESSION_PARAMETERS)
+        if not all(isinstance(item, dict) and "name" in item and "value" in item for item in variables):
+            raise ValueError("Variables must be given as {\"name\": ..., \"value\": ...} pairs")
+        variables = {item["name"]: item["value"] for item in variables}
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ValueError(f"Expression has more than {MAX_NODES} elements")
+    counter = _ElementCounter()
+    values = {name: _to_value(value, name, counter) for name, value in (variables or {}).items()}
+    evaluator = _Evaluator(values, time.monotonic() + TIME_LIMIT_SECONDS)
+    try:
+        return evaluator.eval(tree)
+    except (ArithmeticError, TypeError) as e:
+        raise ValueError(str(e))
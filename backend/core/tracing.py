@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from core.models.state import State
+
+
+class Tracer:
+    """Hooks called by Agent while it runs. All hooks are no-ops; override the ones you need."""
+
+    def on_step_start(self, state: State):
+        pass
+
+    def on_step_end(self, state: State):
+        pass
+
+    def on_llm_start(self, state: State, context: List[Any]):
+        pass
+
+    def on_llm_end(self, state: State, function_calls: List[dict], usage: Dict[str, Any], cached: bool):
+        pass
+
+    def on_tool_start(self, state: State, function_call: dict):
+        pass
+
+    def on_tool_end(self, state: State, function_call: dict, result: dict):
+        pass
+
+    def on_checkpoint(self, state: State, checkpoint: dict):
+        pass
+
+    def on_profile(self, state: State, top_functions: List[dict]):
+        pass
+
+    def on_run_end(self, state: State):
+        """Called when Agent.run returns or raises"""
+        pass
+
+
+def _now_us() -> float:
+    # Wall-clock microseconds, so spans of a run resumed by another process line up
+    return time.time_ns() / 1000
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+class SpanRecorder(Tracer):
+    """
+    Records step, LLM and tool spans as Chrome trace events ("X" complete events, timestamps in
+    microseconds) so a run's timeline can be opened in chrome://tracing or Perfetto.
+    Events are handed to `sink(state_id, events)` at every checkpoint, or kept in memory if no sink is given.
+    """
+
+    def __init__(self, sink: Optional[Callable[[str, List[dict]], None]] = None):
+        self.sink = sink
+        self.events: Dict[str, List[dict]] = {}
+        self._open: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _start(self, key: tuple):
+        with self._lock:
+            self._open[key] = _now_us()
+
+    def _end(self, key: tuple, state: State, name: str, category: str, args: Dict[str, Any]):
+        end = _now_us()
+        with self._lock:
+            start = self._open.pop(key, end)
+            self.events.setdefault(state.id, []).append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": end - start,
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    def _instant(self, state: State, name: str, category: str, args: Dict[str, Any]):
+        with self._lock:
+            self.events.setdefault(state.id, []).append({
+                "name": name,
+                "cat": category,
+                "ph": "i",
+                "s": "t",
+                "ts": _now_us(),
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    def on_step_start(self, state: State):
+        self._start((state.id, "step"))
+
+    def on_step_end(self, state: State):
+        self._end((state.id, "step"), state, f"step {state.steps}", "step", {"step": state.steps, "status": state.status})
+
+    def on_llm_start(self, state: State, context: List[Any]):
+        self._start((state.id, "llm"))
+
+    def on_llm_end(self, state: State, function_calls: List[dict], usage: Dict[str, Any], cached: bool):
+        self._end((state.id, "llm"), state, "llm", "llm", {
+            "step": state.steps,
+            "input_items": len(state.context),
+            "input_bytes": _size(state.context),
+            "output_bytes": _size(function_calls),
+            "function_calls": len(function_calls),
+            "cached_response": cached,
+            **usage,
+        })
+
+    def on_tool_start(self, state: State, function_call: dict):
+        self._start((state.id, "tool", function_call["call_id"]))
+
+    def on_tool_end(self, state: State, function_call: dict, result: dict):
+        self._end((state.id, "tool", function_call["call_id"]), state, function_call["name"], "tool", {
+            "step": state.steps,
+            "call_id": function_call["call_id"],
+            "arguments_bytes": _size(function_call["arguments"]),
+            "output_bytes": len(result.get("output", "")),
+        })
+
+    def on_checkpoint(self, state: State, checkpoint: dict):
+        self._instant(state, "checkpoint", "checkpoint", {
+            "step": checkpoint["step"],
+            "context_length": checkpoint["context_length"],
+            "status": checkpoint["status"],
+        })
+        self.flush(state)
+
+    def on_profile(self, state: State, top_functions: List[dict]):
+        self._instant(state, "profile", "profile", {"top_functions": top_functions})
+        self.flush(state)
+
+    def on_run_end(self, state: State):
+        # Spans still open were cut short by an exception; record them so the failure shows up in the trace
+        with self._lock:
+            open_keys = [key for key in self._open if key[0] == state.id]
+        for key in reversed(open_keys):
+            category = key[1]
+            name = f"step {state.steps}" if category == "step" else category
+            args = {"step": state.steps, "unfinished": True}
+            if category == "tool":
+                args["call_id"] = key[2]
+            self._end(key, state, name, category, args)
+        self.flush(state)
+
+    def flush(self, state: State):
+        """Hand this state's recorded events to the sink"""
+        if self.sink is None:
+            return
+        with self._lock:
+            events = self.events.pop(state.id, [])
+        if events:
+            self.sink(state.id, events)
+
+
+def to_chrome_trace(events: List[dict]) -> Dict[str, Any]:
+    """Wrap trace events in the Chrome trace-event JSON object format"""
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
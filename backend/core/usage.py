@@ -0,0 +1,60 @@
+from typing import Any, Dict, Optional
+
+
+# USD per 1M tokens. Reasoning tokens are billed as output tokens and are
+# already included in output_tokens.
+MODEL_PRICING = {
+    "gpt-5": {"input": 1.25, "cached_input": 0.125, "output": 10.00},
+    "gpt-5-mini": {"input": 0.25, "cached_input": 0.025, "output": 2.00},
+    "gpt-5-nano": {"input": 0.05, "cached_input": 0.005, "output": 0.40},
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+}
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "reasoning_tokens", "cached_tokens")
+
+
+def empty_usage() -> Dict[str, Any]:
+    """Return a zeroed usage record"""
+    usage = {field: 0 for field in USAGE_FIELDS}
+    usage["cost_usd"] = 0.0
+    return usage
+
+
+def extract_usage(response) -> Dict[str, int]:
+    """Read token counts from a Responses API result (missing fields count as 0)"""
+    usage = getattr(response, "usage", None)
+    input_details = getattr(usage, "input_tokens_details", None)
+    output_details = getattr(usage, "output_tokens_details", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "reasoning_tokens": getattr(output_details, "reasoning_tokens", 0) or 0,
+        "cached_tokens": getattr(input_details, "cached_tokens", 0) or 0,
+    }
+
+
+def estimate_cost(model: str, usage: Dict[str, Any], pricing: Optional[Dict[str, Dict[str, float]]] = None) -> float:
+    """Estimate the USD cost of a usage record (0 for models without known pricing)"""
+    prices = (pricing or MODEL_PRICING).get(model)
+    if not prices:
+        return 0.0
+    uncached_input = usage["input_tokens"] - usage["cached_tokens"]
+    return (
+        uncached_input * prices["input"]
+        + usage["cached_tokens"] * prices["cached_input"]
+        + usage["output_tokens"] * prices["output"]
+    ) / 1_000_000
+
+
+def add_usage(total: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a new usage record with both records summed"""
+    result = empty_usage()
+    for field in USAGE_FIELDS + ("cost_usd",):
+        result[field] = (total.get(field) or 0) + (usage.get(field) or 0)
+    return result
+
+
+def total_tokens(usage: Dict[str, Any]) -> int:
+    """Tokens counted against a token budget (input + output)"""
+    return (usage.get("input_tokens") or 0) + (usage.get("output_tokens") or 0)
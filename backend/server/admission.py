@@ -0,0 +1,109 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised when a priority class has no free run slot and its queue is full"""
+
+    def __init__(self, priority: str, retry_after: int):
+        super().__init__(f"Too many agent runs for priority '{priority}'")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class _PriorityClass:
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.running = 0
+        self.queue = deque()
+        self.avg_duration = None  # Moving average of run durations in seconds
+
+
+class AdmissionController:
+    """
+    Runs agent jobs on a dedicated thread pool with per-priority concurrency and queue limits,
+    keeping the request-serving threadpool free for reads like GET /agent/state.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, int]]):
+        self.classes = {
+            name: _PriorityClass(config["max_concurrent"], config["max_queue"])
+            for name, config in limits.items()
+        }
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(c.max_concurrent for c in self.classes.values()),
+            thread_name_prefix="agent-run",
+        )
+
+    def _retry_after(self, priority_class: _PriorityClass) -> int:
+        # Expected time until a slot frees up, assuming queued runs take the average duration
+        avg_duration = priority_class.avg_duration or 5.0
+        waves = (len(priority_class.queue) + 1) / max(1, priority_class.max_concurrent)
+        return max(1, math.ceil(avg_duration * waves))
+
+    def check(self, priority: str):
+        """Raise Overloaded if a job of this priority could not currently be started or queued"""
+        priority_class = self.classes[priority]
+        with self._lock:
+            if priority_class.running >= priority_class.max_concurrent and len(priority_class.queue) >= priority_class.max_queue:
+                raise Overloaded(priority, self._retry_after(priority_class))
+
+    def submit(self, priority: str, fn: Callable, *args: Any) -> str:
+        """Start the job now ("running") or queue it ("pending"); raise Overloaded when both are full"""
+        priority_class = self.classes[priority]
+        with self._lock:
+            if priority_class.running < priority_class.max_concurrent:
+                priority_class.running += 1
+                self._executor.submit(self._run, priority, fn, args)
+                return "running"
+            if len(priority_class.queue) < priority_class.max_queue:
+                priority_class.queue.append((fn, args))
+                return "pending"
+            raise Overloaded(priority, self._retry_after(priority_class))
+
+    def _run(self, priority: str, fn: Callable, args: tuple):
+        priority_class = self.classes[priority]
+        while True:
+            start = time.monotonic()
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("Unhandled error in admitted agent run")
+            duration = time.monotonic() - start
+            with self._lock:
+                priority_class.avg_duration = (
+                    duration if priority_class.avg_duration is None
+                    else 0.8 * priority_class.avg_duration + 0.2 * duration
+                )
+                # Keep the slot and pick up the next queued job of this class, if any
+                if not priority_class.queue:
+                    priority_class.running -= 1
+                    return
+                fn, args = priority_class.queue.popleft()
+
+    def load(self) -> Dict[str, Any]:
+        """Current load per priority class"""
+        with self._lock:
+            return {
+                name: {
+                    "running": c.running,
+                    "queued": len(c.queue),
+                    "max_concurrent": c.max_concurrent,
+                    "max_queue": c.max_queue,
+                    "saturated": c.running >= c.max_concurrent and len(c.queue) >= c.max_queue,
+                    "avg_run_seconds": round(c.avg_duration, 3) if c.avg_duration is not None else None,
+                }
+                for name, c in self.classes.items()
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
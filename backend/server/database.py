@@ -1,11 +1,16 @@
 import json
+import os
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
-from sqlalchemy import create_engine, Column, String, Integer, Text, JSON
+from typing import Any, List, Optional
+from sqlalchemy import create_engine, inspect, text, Column, String, Integer, Float, Text, JSON, DateTime
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, object_session
 from contextlib import contextmanager
 
 from core.models.state import State
+from core.usage import empty_usage
 
 Base = declarative_base()
 
@@ -21,40 +26,166 @@ class StateModel(Base):
     pending_tool_calls = Column(JSON, default=list)
     error = Column(Text, nullable=True)
     final_answer = Column(Text, nullable=True)
+    # Forked states only store their own context items; the first fork_index
+    # items are read from the parent state instead of being copied
+    parent_id = Column(String, nullable=True, index=True)
+    fork_index = Column(Integer, default=0)
+    lineage_id = Column(String, nullable=True)
+    checkpoints = Column(JSON, default=list)
+    # Sub-agents link back to the state that spawned them
+    spawned_by = Column(String, nullable=True, index=True)
+    depth = Column(Integer, default=0)
+    step_usage = Column(JSON, default=list)
+    usage = Column(JSON, nullable=True)
+    token_budget = Column(Integer, nullable=True)
+    cost_budget = Column(Float, nullable=True)
+    priority = Column(String, default="normal")
+    # Launch deduplication: client-supplied Idempotency-Key and hash of prompt + agent configuration
+    idempotency_key = Column(String, nullable=True, unique=True, index=True)
+    request_hash = Column(String, nullable=True)
+    dedup_key = Column(String, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Last write to the row; for finished runs this is when they finished
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+
+class TraceEventModel(Base):
+    """SQLAlchemy model for trace events (Chrome trace-event format) recorded for a state"""
+    __tablename__ = "trace_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    state_id = Column(String, index=True)
+    event = Column(JSON)
+
+
+class ResponseCacheModel(Base):
+    """SQLAlchemy model for caching LLM responses keyed by a hash of their input"""
+    __tablename__ = "llm_responses"
+
+    key = Column(String, primary_key=True)
+    function_calls = Column(JSON, default=list)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 # SQLite database (file-based, perfect for development)
-# Database file is stored in backend/data/ directory
-db_path = Path(__file__).resolve().parent.parent / "data" / "agent_states.db"
+# Database file is stored in backend/data/ directory unless AGENT_DB_PATH is set
+db_path = Path(os.environ.get("AGENT_DB_PATH") or Path(__file__).resolve().parent.parent / "data" / "agent_states.db")
 db_path.parent.mkdir(parents=True, exist_ok=True)  # Create directory if it doesn't exist
 engine = create_engine(f"sqlite:///{db_path}", echo=False)
 Base.metadata.create_all(engine)
 SessionLocal = sessionmaker(bind=engine)
 
 
+def _add_missing_columns():
+    """Add columns (and their indexes) introduced after a database file was created (create_all only creates tables)"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+_add_missing_columns()
+
+
+def own_context(state: State) -> List[Any]:
+    """Return the context items stored on this state's row (excluding the inherited prefix)"""
+    return state.context[state.fork_index:]
+
+
+def load_context(session, db_state: StateModel) -> List[Any]:
+    """Rebuild the full context of a state (a row or any object with context, parent_id and fork_index) by following its fork lineage"""
+    context = list(db_state.context or [])
+    if not db_state.parent_id:
+        return context
+    # Only the lineage columns are needed, so parent rows are not loaded into the session
+    parent = (
+        session.query(StateModel.context, StateModel.parent_id, StateModel.fork_index)
+        .filter(StateModel.id == db_state.parent_id)
+        .first()
+    )
+    prefix = load_context(session, parent)[:db_state.fork_index or 0] if parent else []
+    return prefix + context
+
+
 def pydantic_to_db(state: State) -> StateModel:
     """Convert Pydantic State to database model"""
     return StateModel(
         id=state.id,
         steps=state.steps,
         status=state.status,
-        context=state.context,
+        context=own_context(state),
         pending_tool_calls=state.pending_tool_calls,
         error=state.error,
         final_answer=state.final_answer,
+        parent_id=state.parent_id,
+        fork_index=state.fork_index,
+        lineage_id=state.lineage_id,
+        checkpoints=state.checkpoints,
+        spawned_by=state.spawned_by,
+        depth=state.depth,
+        step_usage=state.step_usage,
+        usage=state.usage,
+        token_budget=state.token_budget,
+        cost_budget=state.cost_budget,
+        priority=state.priority,
     )
 
 
+def descendant_ids(session, state_id: str) -> List[str]:
+    """Return the IDs of all sub-agents spawned (directly or transitively) by a state"""
+    ids = []
+    frontier = [state_id]
+    while frontier:
+        children = session.query(StateModel.id).filter(StateModel.spawned_by.in_(frontier)).all()
+        frontier = [child_id for (child_id,) in children]
+        ids.extend(frontier)
+    return ids
+
+
+def update_db_state(db_state: StateModel, state: State, include_status: bool = True):
+    """Copy the mutable fields of a Pydantic State onto an existing database row"""
+    db_state.steps = state.steps
+    if include_status:
+        db_state.status = state.status
+    db_state.context = own_context(state)
+    db_state.pending_tool_calls = state.pending_tool_calls
+    db_state.error = state.error
+    db_state.final_answer = state.final_answer
+    db_state.checkpoints = state.checkpoints
+    db_state.step_usage = state.step_usage
+    db_state.usage = state.usage
+    db_state.token_budget = state.token_budget
+    db_state.cost_budget = state.cost_budget
+
+
 def db_to_pydantic(db_state: StateModel) -> State:
     """Convert database model to Pydantic State"""
+    session = object_session(db_state)
     return State(
         id=db_state.id,
         steps=db_state.steps,
         status=db_state.status,
-        context=db_state.context or [],
+        context=load_context(session, db_state) if session else (db_state.context or []),
         pending_tool_calls=db_state.pending_tool_calls or [],
         error=db_state.error,
         final_answer=db_state.final_answer,
+        parent_id=db_state.parent_id,
+        fork_index=db_state.fork_index or 0,
+        lineage_id=db_state.lineage_id,
+        checkpoints=db_state.checkpoints or [],
+        spawned_by=db_state.spawned_by,
+        depth=db_state.depth or 0,
+        step_usage=db_state.step_usage or [],
+        usage=db_state.usage or empty_usage(),
+        token_budget=db_state.token_budget,
+        cost_budget=db_state.cost_budget,
+        priority=db_state.priority or "normal",
     )
 
 
@@ -71,3 +202,84 @@ def get_db_session():
     finally:
         session.close()
 
+
+class ResponseCache:
+    """
+    Database-backed LLM response cache (keys are scoped to a fork lineage by the agent).
+    Entries expire after ttl_seconds, and every prune_every writes expired entries and all
+    but the newest max_entries are deleted.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None, prune_every: int = 100):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _cutoff(self) -> Optional[datetime]:
+        return datetime.utcnow() - timedelta(seconds=self.ttl_seconds) if self.ttl_seconds is not None else None
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        with get_db_session() as session:
+            query = session.query(ResponseCacheModel.function_calls).filter(ResponseCacheModel.key == key)
+            cutoff = self._cutoff()
+            if cutoff is not None:
+                query = query.filter(ResponseCacheModel.created_at >= cutoff)
+            cached = query.first()
+            return cached.function_calls if cached else None
+
+    def set(self, key: str, function_calls: List[Any]):
+        with get_db_session() as session:
+            session.merge(ResponseCacheModel(key=key, function_calls=function_calls, created_at=datetime.utcnow()))
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Delete expired entries and the oldest entries beyond max_entries"""
+        with get_db_session() as session:
+            cutoff = self._cutoff()
+            if cutoff is not None:
+                session.query(ResponseCacheModel).filter(
+                    (ResponseCacheModel.created_at < cutoff) | ResponseCacheModel.created_at.is_(None)
+                ).delete(synchronize_session=False)
+            if self.max_entries is not None:
+                oldest_kept = (
+                    session.query(ResponseCacheModel.created_at)
+                    .order_by(ResponseCacheModel.created_at.desc())
+                    .offset(self.max_entries - 1)
+                    .limit(1)
+                    .first()
+                )
+                if oldest_kept is not None:
+                    session.query(ResponseCacheModel).filter(
+                        (ResponseCacheModel.created_at < oldest_kept.created_at) | ResponseCacheModel.created_at.is_(None)
+                    ).delete(synchronize_session=False)
+
+
+def load_state(state_id: str) -> Optional[State]:
+    """Load a state by ID, or None if it doesn't exist"""
+    with get_db_session() as session:
+        db_state = session.query(StateModel).filter(StateModel.id == state_id).first()
+        return db_to_pydantic(db_state) if db_state else None
+
+
+def save_trace_events(state_id: str, events: List[dict]):
+    """Append trace events recorded for a state"""
+    with get_db_session() as session:
+        session.add_all(TraceEventModel(state_id=state_id, event=event) for event in events)
+
+
+def load_trace_events(state_id: str) -> List[dict]:
+    """Load the trace events recorded for a state, in recording order"""
+    with get_db_session() as session:
+        rows = (
+            session.query(TraceEventModel.event)
+            .filter(TraceEventModel.state_id == state_id)
+            .order_by(TraceEventModel.id)
+            .all()
+        )
+        return [event for (event,) in rows]
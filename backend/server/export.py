@@ -0,0 +1,281 @@
+"""
+Streaming export of runs for offline analysis and fine-tuning.
+
+Runs are read from the states table in keyset-paginated chunks, each in its own
+short session, so memory use stays constant however many runs there are and
+agents saving progress are never blocked by a long-running export. Runs are
+exported as JSONL (one run with its full context per line) or as step-level
+Parquet (requires the optional `pyarrow` package).
+
+    python -m server.export --status complete --since 2025-01-01 -o runs.jsonl
+    python -m server.export --format parquet -o steps.parquet
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from core.usage import USAGE_FIELDS, empty_usage
+from server.database import StateModel, get_db_session, load_context
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional, only needed for Parquet export
+    pa = None
+    pq = None
+
+
+EXPORT_FORMATS = ("jsonl", "parquet")
+
+# Columns read per run (never whole ORM objects, so nothing accumulates in the session)
+_RUN_COLUMNS = (
+    StateModel.id,
+    StateModel.status,
+    StateModel.steps,
+    StateModel.created_at,
+    StateModel.priority,
+    StateModel.parent_id,
+    StateModel.fork_index,
+    StateModel.lineage_id,
+    StateModel.spawned_by,
+    StateModel.depth,
+    StateModel.context,
+    StateModel.pending_tool_calls,
+    StateModel.checkpoints,
+    StateModel.step_usage,
+    StateModel.usage,
+    StateModel.token_budget,
+    StateModel.cost_budget,
+    StateModel.error,
+    StateModel.final_answer,
+)
+
+
+class ExportUnavailable(Exception):
+    """Raised when an export format needs an optional dependency that is not installed"""
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 date or timestamp into the naive UTC form stored in created_at"""
+    return to_naive_utc(datetime.fromisoformat(value))
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Convert a timestamp to naive UTC (timestamps without a timezone are assumed to be UTC)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _run_record(session, row) -> Dict[str, Any]:
+    record = dict(row._mapping)
+    record["context"] = load_context(session, row)
+    record["created_at"] = row.created_at.isoformat() if row.created_at else None
+    record["fork_index"] = row.fork_index or 0
+    record["depth"] = row.depth or 0
+    record["pending_tool_calls"] = row.pending_tool_calls or []
+    record["checkpoints"] = row.checkpoints or []
+    record["step_usage"] = row.step_usage or []
+    record["usage"] = row.usage or empty_usage()
+    return record
+
+
+def iter_runs(
+    statuses: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    chunk_size: int = 200,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield runs with their full context, ordered by ID.
+
+    Args:
+        statuses: Only export runs with one of these statuses
+        since: Only export runs created at or after this time (naive UTC)
+        until: Only export runs created before this time (naive UTC)
+        chunk_size: Number of runs read per query; bounds memory use
+    """
+    last_id = None
+    while True:
+        with get_db_session() as session:
+            query = session.query(*_RUN_COLUMNS)
+            if statuses:
+                query = query.filter(StateModel.status.in_(statuses))
+            if since is not None:
+                query = query.filter(StateModel.created_at >= since)
+            if until is not None:
+                query = query.filter(StateModel.created_at < until)
+            if last_id is not None:
+                query = query.filter(StateModel.id > last_id)
+            rows = query.order_by(StateModel.id).limit(chunk_size).all()
+            runs = [_run_record(session, row) for row in rows]
+
+        yield from runs
+        if len(runs) < chunk_size:
+            return
+        last_id = runs[-1]["id"]
+
+
+def iter_steps(runs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Split runs into one record per step.
+
+    A step first executes the calls the previous step's LLM call produced and then calls the LLM
+    again. So `items` (the context the step added) holds the previous step's calls and their
+    outputs, while `function_calls`, `llm_output` and the usage columns describe this step's LLM
+    call. A step that made no LLM call (it answered, asked the user or paused) has no output.
+    """
+    for run in runs:
+        usage_by_step = {usage["step"]: usage for usage in run["step_usage"]}
+        previous_length = 0
+        for checkpoint in run["checkpoints"]:
+            if checkpoint["step"] == 0:
+                # Step 0 checkpoints mark where the run (or resumed fork) started
+                previous_length = checkpoint["context_length"]
+                continue
+            items = run["context"][previous_length:checkpoint["context_length"]]
+            previous_length = checkpoint["context_length"]
+            usage = usage_by_step.get(checkpoint["step"], {})
+            # The checkpoint is taken right after the LLM call, so its pending calls are that call's output
+            llm_output = [
+                {"name": call["name"], "arguments": call["arguments"], "call_id": call["call_id"]}
+                for call in checkpoint.get("pending_tool_calls") or []
+            ] if checkpoint["step"] in usage_by_step else []
+            yield {
+                "state_id": run["id"],
+                "run_status": run["status"],
+                "created_at": run["created_at"],
+                "step": checkpoint["step"],
+                "step_status": checkpoint["status"],
+                "context_length": checkpoint["context_length"],
+                "function_calls": [call["name"] for call in llm_output],
+                "llm_output": json.dumps(llm_output, default=str),
+                "items": json.dumps(items, default=str),
+                **{field: usage.get(field) or 0 for field in USAGE_FIELDS},
+                "cost_usd": usage.get("cost_usd") or 0.0,
+            }
+
+
+def iter_jsonl(runs: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Serialize runs as JSON lines"""
+    for run in runs:
+        yield json.dumps(run, default=str) + "\n"
+
+
+def _step_schema():
+    return pa.schema(
+        [
+            ("state_id", pa.string()),
+            ("run_status", pa.string()),
+            ("created_at", pa.timestamp("us")),
+            ("step", pa.int32()),
+            ("step_status", pa.string()),
+            ("context_length", pa.int32()),
+            ("function_calls", pa.list_(pa.string())),
+            ("llm_output", pa.string()),
+            ("items", pa.string()),
+        ]
+        + [(field, pa.int64()) for field in USAGE_FIELDS]
+        + [("cost_usd", pa.float64())]
+    )
+
+
+class _ChunkSink:
+    """Write-only file object collecting what ParquetWriter writes so it can be streamed out in pieces"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_parquet(steps: Iterable[Dict[str, Any]], row_group_size: int = 1000) -> Iterator[bytes]:
+    """Serialize step records as a Parquet file, yielding its bytes one row group at a time"""
+    # Checked eagerly so callers can report the missing dependency before any output is written
+    if pa is None:
+        raise ExportUnavailable("Parquet export requires pyarrow (pip install pyarrow)")
+    return _parquet_chunks(steps, row_group_size)
+
+
+def _parquet_chunks(steps: Iterable[Dict[str, Any]], row_group_size: int) -> Iterator[bytes]:
+    schema = _step_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def write(batch: List[Dict[str, Any]]) -> bytes:
+        for step in batch:
+            step["created_at"] = datetime.fromisoformat(step["created_at"]) if step["created_at"] else None
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+        return sink.drain()
+
+    batch = []
+    for step in steps:
+        batch.append(step)
+        if len(batch) >= row_group_size:
+            yield write(batch)
+            batch = []
+    if batch:
+        yield write(batch)
+    writer.close()
+    yield sink.drain()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Entry point for `python -m server.export`"""
+    parser = argparse.ArgumentParser(description="Export agent runs as JSONL or step-level Parquet")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl", help="jsonl: one run per line; parquet: one row per step")
+    parser.add_argument("--status", default=None, help="Comma-separated statuses to export (default: all)")
+    parser.add_argument("--since", type=parse_timestamp, default=None, help="Only runs created at or after this ISO 8601 time (UTC unless an offset is given)")
+    parser.add_argument("--until", type=parse_timestamp, default=None, help="Only runs created before this ISO 8601 time")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Runs read per database query")
+    parser.add_argument("-o", "--output", default=None, help="Output file (default: stdout, JSONL only)")
+    args = parser.parse_args(argv)
+
+    statuses = [status for status in args.status.split(",") if status] if args.status else None
+    runs = iter_runs(statuses, args.since, args.until, args.chunk_size)
+
+    if args.format == "parquet":
+        if not args.output:
+            parser.error("--output is required for Parquet export")
+        try:
+            chunks = iter_parquet(iter_steps(runs))
+        except ExportUnavailable as e:
+            parser.exit(1, f"{e}\n")
+        with open(args.output, "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+        return
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for line in iter_jsonl(runs):
+            output.write(line)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,26 @@
+import hashlib
 import json
 import logging
+import os
+import threading
 import uuid
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from functools import reduce
+from fastapi import FastAPI, HTTPException, Query, Header, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
 
 from core.models.state import State
 from core.agent import Agent
 from core.client_tool import ClientTool
+from core.llm import OpenAIBackend
+from core.tracing import SpanRecorder, to_chrome_trace
+from core.usage import add_usage, empty_usage
 from core.tools.math import (
     sum_numbers,
     multiply_numbers,
@@ -16,8 +28,26 @@ from core.tools.math import (
     divide_numbers,
     power,
     square_root,
+    evaluate_expression,
+    EVALUATE_EXPRESSION_DESCRIPTION,
+    EVALUATE_EXPRESSION_PARAMETERS,
+)
+from server.admission import AdmissionController, Overloaded
+from server.export import EXPORT_FORMATS, ExportUnavailable, iter_runs, iter_steps, iter_jsonl, iter_parquet, to_naive_utc
+from server.database import (
+    get_db_session,
+    StateModel,
+    ResponseCache,
+    pydantic_to_db,
+    db_to_pydantic,
+    own_context,
+    load_context,
+    update_db_state,
+    descendant_ids,
+    load_state,
+    save_trace_events,
+    load_trace_events,
 )
-from server.database import get_db_session, StateModel, pydantic_to_db, db_to_pydantic
 
 # Configure logging
 logging.basicConfig(
@@ -33,17 +63,80 @@ tools = [
     ClientTool(name="subtract_numbers", description="Subtract two numbers", function=subtract_numbers),
     ClientTool(name="divide_numbers", description="Divide two numbers", function=divide_numbers),
     ClientTool(name="power", description="Raise a number to a power", function=power),
-    ClientTool(name="square_root", description="Take the square root of a number", function=square_root)
+    ClientTool(name="square_root", description="Take the square root of a number", function=square_root),
+    ClientTool(
+        name="evaluate_expression",
+        description=EVALUATE_EXPRESSION_DESCRIPTION,
+        function=evaluate_expression,
+        parameters=EVALUATE_EXPRESSION_PARAMETERS,
+    )
 ]
 
+# Shared pooled LLM transport reused by every agent run in this process
+llm_backend = OpenAIBackend(max_connections=100, max_keepalive_connections=20)
+
+# Optional per-run tracing (AGENT_TRACING=1) and cProfile sampling of the agent loop
+# (AGENT_PROFILE_SAMPLE_RATE, fraction of runs between 0 and 1)
+tracer = SpanRecorder(sink=save_trace_events) if os.environ.get("AGENT_TRACING") == "1" else None
+profile_sample_rate = float(os.environ.get("AGENT_PROFILE_SAMPLE_RATE", "0"))
+
 # Create an Agent with the tools
 agent = Agent(
     tools=tools,
-    max_steps=10
+    max_steps=10,
+    response_cache=ResponseCache(
+        ttl_seconds=float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "86400")),
+        max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "50000")),
+    ),
+    backend=llm_backend,
+    max_subagent_concurrency=4,
+    state_loader=load_state,
+    tracer=tracer,
+    profile_sample_rate=profile_sample_rate
 )
 
+# How long a completed run is served to identical dedup launches instead of starting a new run
+DEDUP_TTL_SECONDS = int(os.environ.get("DEDUP_TTL_SECONDS", "300"))
+# Concurrency and queue limits per priority class (override with a JSON ADMISSION_LIMITS env var).
+# Sub-agents are not counted: each admitted run may run up to max_subagent_concurrency children
+# on its own threads, so the worst case is max_concurrent * (1 + max_subagent_concurrency) threads
+ADMISSION_LIMITS = json.loads(os.environ.get("ADMISSION_LIMITS", "null")) or {
+    "high": {"max_concurrent": 8, "max_queue": 50},
+    "normal": {"max_concurrent": 16, "max_queue": 200},
+    "low": {"max_concurrent": 4, "max_queue": 100},
+}
+DEFAULT_PRIORITY = "normal"
+admission = AdmissionController(ADMISSION_LIMITS)
+# Serializes the lookup + insert of idempotent and dedup launches so concurrent identical ones attach to one run
+_launch_lock = threading.Lock()
+
 app = FastAPI()
 
+
+@app.on_event("startup")
+def _requeue_pending_runs():
+    """Resubmit runs a previous server process left pending (the admission queue only lives in memory)"""
+    with get_db_session() as session:
+        pending = (
+            session.query(StateModel.id, StateModel.priority)
+            .filter(StateModel.status == "pending")
+            .order_by(StateModel.created_at)
+            .all()
+        )
+    for state_id, priority in pending:
+        priority = priority if priority in admission.classes else DEFAULT_PRIORITY
+        try:
+            admission.submit(priority, _run_agent_in_background, state_id)
+        except Overloaded:
+            # No room left; keep the run so it can be continued with /agent/resume
+            _set_status(state_id, "paused")
+
+
+@app.on_event("shutdown")
+def _close_llm_backend():
+    admission.shutdown()
+    llm_backend.close()
+
 # Add CORS middleware to allow frontend to communicate with the API
 # Allow all origins for preview/proxy environments (can be restricted in production)
 app.add_middleware(
@@ -57,10 +150,17 @@ app.add_middleware(
 
 class LaunchRequest(BaseModel):
     input_prompt: str
+    token_budget: Optional[int] = None  # Max input + output tokens for the run
+    cost_budget: Optional[float] = None  # Max estimated cost in USD for the run
+    dedup: bool = False  # Reuse an in-flight or recently completed run for the same prompt and agent config
+    priority: str = DEFAULT_PRIORITY  # Admission priority class
 
 
 class ResumeRequest(BaseModel):
     id: str
+    # Optionally raise the budgets of a run that stopped with budget_exceeded
+    token_budget: Optional[int] = None
+    cost_budget: Optional[float] = None
 
 
 class ProvideInputRequest(BaseModel):
@@ -72,45 +172,60 @@ class PauseRequest(BaseModel):
     id: str
 
 
-def _create_progress_callback(state_id: str):
-    """Create a progress callback function that saves state after each step"""
-    def save_progress(state: State):
-        with get_db_session() as session:
-            db_state = session.query(StateModel).filter(StateModel.id == state_id).first()
-            if db_state:
-                # Check if status was changed to "paused" externally (before overwriting)
-                if db_state.status == "paused":
-                    # Update local state to paused so agent loop will exit
-                    state.status = "paused"
-                    # Don't overwrite the paused status - just save other fields
-                    db_state.steps = state.steps
-                    db_state.context = state.context
-                    db_state.pending_tool_calls = state.pending_tool_calls
-                    db_state.error = state.error
-                    db_state.final_answer = state.final_answer
-                else:
-                    # Normal save - update all fields including status
-                    db_state.steps = state.steps
-                    db_state.status = state.status
-                    db_state.context = state.context
-                    db_state.pending_tool_calls = state.pending_tool_calls
-                    db_state.error = state.error
-                    db_state.final_answer = state.final_answer
-                session.commit()
-    return save_progress
+class ForkRequest(BaseModel):
+    id: str
+    step: Optional[int] = None  # Defaults to the latest step of the parent
+
+
+class StateSummary(BaseModel):
+    """Lightweight view of a state for bulk polling (no context)"""
+    id: str
+    status: str
+    steps: int
+    final_answer: Optional[str] = None
+    error: Optional[str] = None
+    question: Optional[str] = None  # The pending ask_human question while waiting for human input
+
+
+def _save_progress(state: State):
+    """Progress callback that saves a state after each step (also used for the sub-agents it spawns)"""
+    with get_db_session() as session:
+        db_state = session.query(StateModel).filter(StateModel.id == state.id).first()
+        if not db_state:
+            # First save of a newly spawned sub-agent
+            session.add(pydantic_to_db(state))
+        # Check if status was changed to "paused" externally (before overwriting)
+        elif db_state.status == "paused":
+            # Update local state to paused so agent loop will exit
+            state.status = "paused"
+            # Don't overwrite the paused status - just save other fields
+            update_db_state(db_state, state, include_status=False)
+        else:
+            # Normal save - update all fields including status
+            update_db_state(db_state, state)
+        session.commit()
 
 
 def _save_state_to_db(state_id: str, state: State):
-    """Save a state to the database"""
+    """Save the final state of a run to the database"""
+    with get_db_session() as session:
+        db_state = session.query(StateModel).filter(StateModel.id == state_id).first()
+        if not db_state:
+            return
+        # The last progress save already published this run's result, so a pending/running row
+        # means provide_input or resume has handed it to a new run: don't revert it to a stale state
+        if db_state.status in ("pending", "running") and state.status not in ("pending", "running"):
+            return
+        update_db_state(db_state, state)
+        session.commit()
+
+
+def _set_status(state_id: str, status: str):
+    """Set the status of a state in the database"""
     with get_db_session() as session:
         db_state = session.query(StateModel).filter(StateModel.id == state_id).first()
         if db_state:
-            db_state.steps = state.steps
-            db_state.status = state.status
-            db_state.context = state.context
-            db_state.pending_tool_calls = state.pending_tool_calls
-            db_state.error = state.error
-            db_state.final_answer = state.final_answer
+            db_state.status = status
             session.commit()
 
 
@@ -125,6 +240,15 @@ def _mark_state_failed(state_id: str, error: str):
             session.commit()
 
 
+def _check_priority(priority: str):
+    if priority not in admission.classes:
+        raise HTTPException(status_code=400, detail=f"Unknown priority '{priority}'. Use one of: {', '.join(admission.classes)}")
+
+
+def _too_many_requests(error: Overloaded) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(error), headers={"Retry-After": str(error.retry_after)})
+
+
 def _run_agent_in_background(state_id: str, working_state: Optional[State] = None):
     """Run the agent in a background thread and update the database"""
     try:
@@ -151,8 +275,7 @@ def _run_agent_in_background(state_id: str, working_state: Optional[State] = Non
                     session.commit()
         
         # Run agent with progress callback
-        save_progress = _create_progress_callback(state_id)
-        final_state = agent.run(working_state, progress_callback=save_progress)
+        final_state = agent.run(working_state, progress_callback=_save_progress)
         
         # Final update to ensure everything is saved
         _save_state_to_db(state_id, final_state)
@@ -165,22 +288,120 @@ def _run_agent_in_background(state_id: str, working_state: Optional[State] = Non
         _mark_state_failed(state_id, str(e))
 
 
+def _dedup_key(payload: LaunchRequest) -> str:
+    """Hash of the prompt, budgets and agent configuration identifying equivalent launches"""
+    key = json.dumps(
+        {
+            "input_prompt": payload.input_prompt,
+            "token_budget": payload.token_budget,
+            "cost_budget": payload.cost_budget,
+            "agent": agent.config_fingerprint(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _request_hash(payload: LaunchRequest) -> str:
+    """Hash of the launch request body, used to detect an Idempotency-Key reused for a different request"""
+    return hashlib.sha256(json.dumps(payload.model_dump(), sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _find_existing_launch(
+    session,
+    idempotency_key: Optional[str],
+    dedup_key: Optional[str],
+    request_hash: Optional[str] = None,
+) -> Optional[StateModel]:
+    """Find a run that an idempotent retry or a deduplicated launch should attach to"""
+    if idempotency_key:
+        db_state = session.query(StateModel).filter(StateModel.idempotency_key == idempotency_key).first()
+        if db_state:
+            if request_hash and db_state.request_hash and db_state.request_hash != request_hash:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            return db_state
+    if dedup_key:
+        # Attach to an in-flight run, or serve a result that completed within the TTL from storage
+        cutoff = datetime.utcnow() - timedelta(seconds=DEDUP_TTL_SECONDS)
+        return (
+            session.query(StateModel)
+            .filter(StateModel.dedup_key == dedup_key)
+            .filter(
+                StateModel.status.in_(("pending", "running"))
+                | (
+                    (StateModel.status == "complete")
+                    # Rows written before updated_at existed fall back to their creation time
+                    & (func.coalesce(StateModel.updated_at, StateModel.created_at) >= cutoff)
+                )
+            )
+            .order_by(StateModel.created_at.desc())
+            .first()
+        )
+    return None
+
+
 @app.post("/agent/launch", response_model=State)
-def agent_launch(payload: LaunchRequest, background_tasks: BackgroundTasks):
-    """Launch a new agent workflow"""
+def agent_launch(
+    payload: LaunchRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+):
+    """Launch a new agent workflow (or return the run an Idempotency-Key / dedup launch maps to)"""
+    _check_priority(payload.priority)
+    dedup_key = _dedup_key(payload) if payload.dedup else None
+    request_hash = _request_hash(payload)
+
     # Create initial state
     context = [{"role": "user", "content": payload.input_prompt}]
-    initial_state = State(id=str(uuid.uuid4()), context=context, status="running")
-    
-    # Save to database
-    with get_db_session() as session:
-        db_state = pydantic_to_db(initial_state)
-        session.add(db_state)
-        session.commit()
-    
-    # Run agent in background
-    background_tasks.add_task(_run_agent_in_background, initial_state.id)
-    
+    initial_state = State(
+        id=str(uuid.uuid4()),
+        context=context,
+        # Stays pending until the admission controller starts the run
+        status="pending",
+        token_budget=payload.token_budget,
+        cost_budget=payload.cost_budget,
+        priority=payload.priority,
+    )
+
+    # Plain launches never attach to an existing run, so they don't queue behind the lock
+    launch_lock = _launch_lock if idempotency_key or dedup_key else nullcontext()
+    try:
+        with launch_lock, get_db_session() as session:
+            existing = _find_existing_launch(session, idempotency_key, dedup_key, request_hash)
+            if existing:
+                response.headers["Idempotent-Replayed"] = "true"
+                return db_to_pydantic(existing)
+
+            # Only new runs are shed under load; retries and dedup hits above still get their run
+            try:
+                admission.check(payload.priority)
+            except Overloaded as e:
+                raise _too_many_requests(e)
+
+            # Save to database
+            db_state = pydantic_to_db(initial_state)
+            db_state.idempotency_key = idempotency_key
+            db_state.request_hash = request_hash
+            db_state.dedup_key = dedup_key
+            session.add(db_state)
+            session.commit()
+    except IntegrityError:
+        # Another server process stored the same Idempotency-Key first
+        with get_db_session() as session:
+            existing = _find_existing_launch(session, idempotency_key, None, request_hash)
+            if not existing:
+                raise
+            response.headers["Idempotent-Replayed"] = "true"
+            return db_to_pydantic(existing)
+
+    # Run agent in background, or queue it if this priority class is at its concurrency limit
+    try:
+        initial_state.status = admission.submit(initial_state.priority, _run_agent_in_background, initial_state.id)
+    except Overloaded as e:
+        with get_db_session() as session:
+            session.query(StateModel).filter(StateModel.id == initial_state.id).delete()
+        raise _too_many_requests(e)
+
     return initial_state
 
 
@@ -194,16 +415,99 @@ def get_state(state_id: str):
         return db_to_pydantic(db_state)
 
 
-def _get_call_id_from_state(state: State) -> Optional[str]:
-    """Extract the call_id from the last ask_human call in context"""
-    for item in reversed(state.context):
+@app.get("/agent/states", response_model=List[State])
+def get_states(ids: List[str] = Query(..., description="State IDs, comma-separated or repeated")):
+    """Get the current state of many agents in one request (unknown IDs are skipped)"""
+    state_ids = list(dict.fromkeys(i for value in ids for i in value.split(",") if i))
+    states = []
+    with get_db_session() as session:
+        # Query in chunks to stay well below SQLite's bound-parameter limit
+        for start in range(0, len(state_ids), 500):
+            chunk = state_ids[start:start + 500]
+            db_states = session.query(StateModel).filter(StateModel.id.in_(chunk)).all()
+            states.extend(db_to_pydantic(db_state) for db_state in db_states)
+    return states
+
+
+def _last_ask_human_call(context: List) -> Optional[dict]:
+    for item in reversed(context):
         if isinstance(item, dict) and item.get("type") == "function_call" and item.get("name") == "ask_human":
-            return item.get("call_id")
+            return item
     return None
 
 
+def _get_call_id_from_state(state: State) -> Optional[str]:
+    """Extract the call_id from the last ask_human call in context"""
+    call = _last_ask_human_call(state.context)
+    return call.get("call_id") if call else None
+
+
+def _pending_question(context: List) -> Optional[str]:
+    """Extract the question of the last ask_human call in context"""
+    call = _last_ask_human_call(context)
+    if not call:
+        return None
+    try:
+        return json.loads(call.get("arguments") or "{}").get("question")
+    except json.JSONDecodeError:
+        return None
+
+
+@app.get("/agent/states/summary", response_model=List[StateSummary])
+def get_state_summaries(ids: List[str] = Query(..., description="State IDs, comma-separated or repeated")):
+    """Get the status, step count, final answer and pending question of many agents without their context"""
+    state_ids = list(dict.fromkeys(i for value in ids for i in value.split(",") if i))
+    summaries = []
+    with get_db_session() as session:
+        for start in range(0, len(state_ids), 500):
+            chunk = state_ids[start:start + 500]
+            rows = (
+                session.query(StateModel.id, StateModel.status, StateModel.steps, StateModel.final_answer, StateModel.error)
+                .filter(StateModel.id.in_(chunk))
+                .all()
+            )
+            # Only states waiting for input need their context, to read the pending question
+            waiting_ids = [row.id for row in rows if row.status == "waiting_human_input"]
+            questions = {}
+            if waiting_ids:
+                for row in (
+                    session.query(StateModel.id, StateModel.context, StateModel.parent_id, StateModel.fork_index)
+                    .filter(StateModel.id.in_(waiting_ids))
+                ):
+                    questions[row.id] = _pending_question(load_context(session, row))
+            summaries.extend(
+                StateSummary(
+                    id=row.id,
+                    status=row.status,
+                    steps=row.steps or 0,
+                    final_answer=row.final_answer,
+                    error=row.error,
+                    question=questions.get(row.id),
+                )
+                for row in rows
+            )
+    return summaries
+
+
+@app.get("/agent/trace/{state_id}")
+def get_trace(state_id: str):
+    """Get the recorded spans of a run as Chrome trace-event JSON (open in chrome://tracing or Perfetto)"""
+    with get_db_session() as session:
+        if not session.query(StateModel.id).filter(StateModel.id == state_id).first():
+            raise HTTPException(status_code=404, detail="State not found")
+    return to_chrome_trace(load_trace_events(state_id))
+
+
+@app.get("/agent/state/{state_id}/children", response_model=List[State])
+def get_children(state_id: str):
+    """Get the sub-agents spawned by a state"""
+    with get_db_session() as session:
+        db_states = session.query(StateModel).filter(StateModel.spawned_by == state_id).all()
+        return [db_to_pydantic(db_state) for db_state in db_states]
+
+
 @app.post("/agent/provide_input", response_model=State)
-def provide_input(payload: ProvideInputRequest, background_tasks: BackgroundTasks):
+def provide_input(payload: ProvideInputRequest):
     """Provide human input to a state waiting for human input and resume execution"""
     with get_db_session() as session:
         db_state = session.query(StateModel).filter(StateModel.id == payload.id).first()
@@ -219,6 +523,11 @@ def provide_input(payload: ProvideInputRequest, background_tasks: BackgroundTask
         
         # Convert to Pydantic while still in session
         working_state = db_to_pydantic(db_state)
+
+    try:
+        admission.check(working_state.priority)
+    except Overloaded as e:
+        raise _too_many_requests(e)
     
     # Find the call_id from the last ask_human call
     call_id = _get_call_id_from_state(working_state)
@@ -239,12 +548,17 @@ def provide_input(payload: ProvideInputRequest, background_tasks: BackgroundTask
     # Update state in database with new context
     with get_db_session() as session:
         db_state = session.query(StateModel).filter(StateModel.id == payload.id).first()
-        db_state.context = working_state.context
-        db_state.status = "running"  # Change status back to running so agent can continue
+        db_state.context = own_context(working_state)
+        db_state.status = "pending"  # Becomes running as soon as the admission controller starts it
         session.commit()
     
     # Run agent in background (non-blocking) - agent was paused, now resume with human input
-    background_tasks.add_task(_run_agent_in_background, payload.id, working_state)
+    try:
+        working_state.status = admission.submit(working_state.priority, _run_agent_in_background, payload.id, working_state)
+    except Overloaded as e:
+        # The answer is kept; the run can be continued later with /agent/resume
+        _set_status(payload.id, "paused")
+        raise _too_many_requests(e)
     
     # Return updated state immediately
     return working_state
@@ -265,8 +579,13 @@ def agent_pause(payload: PauseRequest):
                 detail=f"Cannot pause agent. Current status: {db_state.status}. Only agents with status 'running' can be paused."
             )
         
-        # Set status to paused
+        # Set status to paused, including any running sub-agents
         db_state.status = "paused"
+        child_ids = descendant_ids(session, payload.id)
+        if child_ids:
+            session.query(StateModel).filter(
+                StateModel.id.in_(child_ids), StateModel.status == "running"
+            ).update({"status": "paused"}, synchronize_session=False)
         session.commit()
         
         # Return updated state
@@ -274,7 +593,7 @@ def agent_pause(payload: PauseRequest):
 
 
 @app.post("/agent/resume", response_model=State)
-def agent_resume(payload: ResumeRequest, background_tasks: BackgroundTasks):
+def agent_resume(payload: ResumeRequest):
     """Resume a paused or interrupted workflow"""
     with get_db_session() as session:
         db_state = session.query(StateModel).filter(StateModel.id == payload.id).first()
@@ -282,19 +601,158 @@ def agent_resume(payload: ResumeRequest, background_tasks: BackgroundTasks):
             raise HTTPException(status_code=404, detail="State not found")
         
         # Prevent concurrent execution
-        if db_state.status == "running":
+        if db_state.status in ("running", "pending"):
             raise HTTPException(status_code=409, detail="Agent is already running for this state")
         # Prevent resuming while waiting for human input (use provide_input instead)
         if db_state.status == "waiting_human_input":
             raise HTTPException(status_code=400, detail="Agent is waiting for human input")
         
-        # Clear error and convert to Pydantic
+        try:
+            admission.check(db_state.priority or DEFAULT_PRIORITY)
+        except Overloaded as e:
+            raise _too_many_requests(e)
+        previous_status = db_state.status
+
+        # Paused sub-agents resume together with their parent
+        child_ids = descendant_ids(session, payload.id)
+        if child_ids:
+            session.query(StateModel).filter(
+                StateModel.id.in_(child_ids), StateModel.status == "paused"
+            ).update({"status": "running"}, synchronize_session=False)
+
+        # Clear error, apply any new budgets and convert to Pydantic
         db_state.error = None
+        if payload.token_budget is not None:
+            db_state.token_budget = payload.token_budget
+        if payload.cost_budget is not None:
+            db_state.cost_budget = payload.cost_budget
+        db_state.status = "pending"  # Becomes running as soon as the admission controller starts it
         session.commit()
         working_state = db_to_pydantic(db_state)
     
     # Run agent in background (non-blocking) - agent was paused, now resume
-    background_tasks.add_task(_run_agent_in_background, payload.id, working_state)
+    try:
+        working_state.status = admission.submit(working_state.priority, _run_agent_in_background, payload.id, working_state)
+    except Overloaded as e:
+        _set_status(payload.id, previous_status)
+        raise _too_many_requests(e)
     
     # Return current state immediately
     return working_state
+
+
+@app.post("/agent/fork", response_model=State)
+def agent_fork(payload: ForkRequest):
+    """Create a new state branching from an existing state at a given step"""
+    with get_db_session() as session:
+        db_state = session.query(StateModel).filter(StateModel.id == payload.id).first()
+        if not db_state:
+            raise HTTPException(status_code=404, detail="State not found")
+        parent_state = db_to_pydantic(db_state)
+
+    step = parent_state.steps if payload.step is None else payload.step
+    checkpoint = next((c for c in parent_state.checkpoints if c["step"] == step), None)
+    if checkpoint is None:
+        raise HTTPException(status_code=400, detail=f"No checkpoint recorded for step {step}")
+    if checkpoint["status"] == "complete":
+        raise HTTPException(status_code=400, detail=f"Cannot fork from step {step}: the run completed at this step")
+
+    # Usage spent by the parent up to the fork point counts towards the fork's budgets
+    step_usage = [u for u in parent_state.step_usage if u["step"] <= step]
+
+    # The forked state shares the parent's context prefix instead of copying it into its own row
+    fork_index = checkpoint["context_length"]
+    forked_state = State(
+        id=str(uuid.uuid4()),
+        steps=step,
+        # Waiting forks accept a (different) answer via provide_input, others continue via resume
+        status="waiting_human_input" if checkpoint["status"] == "waiting_human_input" else "paused",
+        context=parent_state.context[:fork_index],
+        # Sub-agents belong to the parent run; a fork spawns its own
+        pending_tool_calls=[
+            {key: value for key, value in call.items() if key != "child_ids"}
+            for call in checkpoint["pending_tool_calls"]
+        ],
+        parent_id=parent_state.id,
+        fork_index=fork_index,
+        lineage_id=parent_state.lineage_id or parent_state.id,
+        checkpoints=[c for c in parent_state.checkpoints if c["step"] <= step],
+        step_usage=step_usage,
+        usage=reduce(add_usage, step_usage, empty_usage()),
+        token_budget=parent_state.token_budget,
+        cost_budget=parent_state.cost_budget,
+    )
+
+    with get_db_session() as session:
+        session.add(pydantic_to_db(forked_state))
+        session.commit()
+
+    return forked_state
+
+
+@app.get("/llm/stats")
+def get_llm_stats():
+    """Get LLM transport statistics (requests served and pooled connections opened)"""
+    return agent.backend.stats()
+
+
+@app.get("/agent/usage")
+def get_usage_summary():
+    """Get token usage and estimated cost totals across all runs, overall and per status"""
+    totals = empty_usage()
+    by_status = {}
+    runs = 0
+    with get_db_session() as session:
+        for status, usage in session.query(StateModel.status, StateModel.usage).yield_per(500):
+            usage = usage or empty_usage()
+            runs += 1
+            totals = add_usage(totals, usage)
+            entry = by_status.setdefault(status, {"runs": 0, **empty_usage()})
+            entry.update(add_usage(entry, usage))
+            entry["runs"] += 1
+    return {"runs": runs, "totals": totals, "by_status": by_status}
+
+
+@app.get("/agent/export")
+def export_runs(
+    format: str = Query("jsonl", description="jsonl: one run with its full context per line; parquet: one row per step"),
+    status: Optional[List[str]] = Query(None, description="Statuses to export, comma-separated or repeated"),
+    since: Optional[datetime] = Query(None, description="Only runs created at or after this time (UTC unless an offset is given)"),
+    until: Optional[datetime] = Query(None, description="Only runs created before this time"),
+    chunk_size: int = Query(200, ge=1, le=5000, description="Runs read per database query"),
+):
+    """Stream runs as JSONL or step-level Parquet, reading the database in chunks so memory use stays constant"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format '{format}', expected one of {', '.join(EXPORT_FORMATS)}")
+    statuses = [s for value in status for s in value.split(",") if s] if status else None
+    runs = iter_runs(
+        statuses,
+        to_naive_utc(since) if since else None,
+        to_naive_utc(until) if until else None,
+        chunk_size,
+    )
+    if format == "parquet":
+        try:
+            chunks = iter_parquet(iter_steps(runs))
+        except ExportUnavailable as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        return StreamingResponse(
+            chunks,
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": 'attachment; filename="agent_steps.parquet"'},
+        )
+    return StreamingResponse(
+        iter_jsonl(runs),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="agent_runs.jsonl"'},
+    )
+
+
+@app.get("/health")
+def health(response: Response):
+    """Report current load per priority class; returns 503 while the default class cannot accept launches"""
+    load = admission.load()
+    saturated = load[DEFAULT_PRIORITY]["saturated"] if DEFAULT_PRIORITY in load else all(c["saturated"] for c in load.values())
+    if saturated:
+        response.status_code = 503
+    return {"status": "saturated" if saturated else "ok", "priorities": load}
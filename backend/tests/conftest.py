@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# The server opens its database on import, so point it at a throwaway file first
+os.environ.setdefault("AGENT_DB_PATH", str(Path(tempfile.mkdtemp()) / "agent_states.db"))
+
+from fastapi.testclient import TestClient
+
+import server.main as server_main
+from core.llm import LocalBackend
+
+
+@pytest.fixture
+def use_responder(monkeypatch):
+    """Run the server's agent offline: use_responder(responder) installs and returns a LocalBackend"""
+    def install(responder) -> LocalBackend:
+        backend = LocalBackend(responder)
+        monkeypatch.setattr(server_main.agent, "backend", backend)
+        return backend
+    return install
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One app lifetime per session: the shutdown hook stops the admission controller for good
+    with TestClient(server_main.app) as test_client:
+        yield test_client
+
+
+def wait_for(client: TestClient, state_id: str, timeout: float = 10.0) -> dict:
+    """Poll a run until it leaves the running/pending statuses"""
+    deadline = time.monotonic() + timeout
+    while True:
+        state = client.get(f"/agent/state/{state_id}").json()
+        if state["status"] not in ("running", "pending") or time.monotonic() > deadline:
+            return state
+        time.sleep(0.02)
+
+
+def first_prompt(context) -> str:
+    return context[0]["content"]
+
+
+def tool_outputs(context):
+    return [item for item in context if isinstance(item, dict) and item.get("type") == "function_call_output"]
+
+
+def add_then_answer(context):
+    """Responder making one tool call, then answering with its result"""
+    outputs = tool_outputs(context)
+    if not outputs:
+        return [{"name": "sum_numbers", "arguments": {"a": 2, "b": 3}}]
+    return [{"name": "final_answer", "arguments": {"answer": f"{first_prompt(context)}: {outputs[-1]['output']}"}}]
@@ -0,0 +1,91 @@
+import threading
+import uuid
+
+import pytest
+
+import server.main as server_main
+from core.models.state import State
+from server.admission import AdmissionController
+from server.database import StateModel, get_db_session, pydantic_to_db
+from tests.conftest import wait_for
+
+
+@pytest.fixture
+def one_slot(monkeypatch, use_responder):
+    """One run slot and one queue slot; runs block until the returned event is set"""
+    release = threading.Event()
+
+    def responder(context):
+        release.wait(10)
+        return [{"name": "final_answer", "arguments": {"answer": "done"}}]
+
+    use_responder(responder)
+    admission = AdmissionController({"normal": {"max_concurrent": 1, "max_queue": 1}})
+    monkeypatch.setattr(server_main, "admission", admission)
+    yield release
+    release.set()
+    admission.shutdown()
+
+
+def test_overload_queues_then_sheds_new_launches(client, one_slot):
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    running = client.post("/agent/launch", json={"input_prompt": "first"}, headers=headers).json()
+    pending = client.post("/agent/launch", json={"input_prompt": "second"}).json()
+    assert running["status"] == "running"
+    assert pending["status"] == "pending"
+    assert client.get(f"/agent/state/{pending['id']}").json()["status"] == "pending"
+
+    health = client.get("/health")
+    assert health.status_code == 503
+    load = health.json()["priorities"]["normal"]
+    assert (load["running"], load["queued"], load["saturated"]) == (1, 1, True)
+
+    shed = client.post("/agent/launch", json={"input_prompt": "third"})
+    assert shed.status_code == 429
+    assert int(shed.headers["Retry-After"]) >= 1
+    # A retry of an accepted launch still gets its run while new launches are shed
+    replay = client.post("/agent/launch", json={"input_prompt": "first"}, headers=headers)
+    assert replay.status_code == 200
+    assert replay.json()["id"] == running["id"]
+
+    one_slot.set()
+    assert wait_for(client, running["id"])["status"] == "complete"
+    assert wait_for(client, pending["id"])["status"] == "complete"
+    assert client.get("/health").status_code == 200
+
+
+def test_pending_runs_are_requeued_on_startup(client, one_slot):
+    orphan = State(id=str(uuid.uuid4()), context=[{"role": "user", "content": "orphaned"}], status="pending")
+    with get_db_session() as session:
+        session.add(pydantic_to_db(orphan))
+        session.commit()
+
+    one_slot.set()
+    server_main._requeue_pending_runs()
+    assert wait_for(client, orphan.id)["status"] == "complete"
+
+
+def test_final_save_does_not_revert_an_answered_run(use_responder, monkeypatch):
+    use_responder(lambda context: [{"name": "ask_human", "arguments": {"question": "Which root?"}}])
+    state = State(id=str(uuid.uuid4()), context=[{"role": "user", "content": "ask"}], status="pending")
+    with get_db_session() as session:
+        session.add(pydantic_to_db(state))
+        session.commit()
+
+    save_progress = server_main._save_progress
+
+    def answer_after_last_save(state):
+        save_progress(state)
+        if state.status == "waiting_human_input":
+            # provide_input lands between the run's last progress save and its final save
+            server_main._set_status(state.id, "pending")
+
+    monkeypatch.setattr(server_main, "_save_progress", answer_after_last_save)
+    server_main._run_agent_in_background(state.id)
+
+    with get_db_session() as session:
+        db_state = session.query(StateModel).filter(StateModel.id == state.id).first()
+        assert db_state.status == "pending"
+        # Don't leave a pending row behind for the startup requeue
+        session.delete(db_state)
+        session.commit()
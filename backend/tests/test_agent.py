@@ -13,6 +13,9 @@ from core.tools.math import (
     divide_numbers,
     power,
     square_root,
+    evaluate_expression,
+    EVALUATE_EXPRESSION_DESCRIPTION,
+    EVALUATE_EXPRESSION_PARAMETERS,
 )
 from core.tools.human_interaction import ask_human_cli
 
@@ -27,7 +30,13 @@ def build_agent() -> Agent:
         ClientTool(name="subtract_numbers", description="Subtract two numbers", function=subtract_numbers),
         ClientTool(name="divide_numbers", description="Divide two numbers", function=divide_numbers),
         ClientTool(name="power", description="Raise a number to a power", function=power),
-        ClientTool(name="square_root", description="Take the square root of a number", function=square_root)
+        ClientTool(name="square_root", description="Take the square root of a number", function=square_root),
+        ClientTool(
+            name="evaluate_expression",
+            description=EVALUATE_EXPRESSION_DESCRIPTION,
+            function=evaluate_expression,
+            parameters=EVALUATE_EXPRESSION_PARAMETERS,
+        )
     ]
     return Agent(tools=tools, max_steps=5)
 
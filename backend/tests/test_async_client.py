@@ -0,0 +1,110 @@
+import asyncio
+import uuid
+
+import httpx
+
+import server.main as server_main
+from client.async_client import AsyncClient
+from tests.conftest import tool_outputs, wait_for
+
+
+def ask_then_answer(context):
+    # Ask once, then answer with whatever the human said
+    outputs = tool_outputs(context)
+    if not outputs:
+        return [{"name": "ask_human", "arguments": {"question": "Which root?"}}]
+    return [{"name": "final_answer", "arguments": {"answer": outputs[-1]["output"]}}]
+
+
+async def _in_process_client() -> AsyncClient:
+    client = AsyncClient()
+    await client.http.aclose()
+    client.http = httpx.AsyncClient(transport=httpx.ASGITransport(app=server_main.app), base_url="http://test")
+    return client
+
+
+def test_state_summaries_omit_context(client, use_responder):
+    use_responder(ask_then_answer)
+    state = wait_for(client, client.post("/agent/launch", json={"input_prompt": f"summary {uuid.uuid4()}"}).json()["id"])
+    assert state["status"] == "waiting_human_input"
+
+    unknown = str(uuid.uuid4())
+    summaries = client.get("/agent/states/summary", params={"ids": f"{state['id']},{unknown}"}).json()
+    assert summaries == [{
+        "id": state["id"],
+        "status": "waiting_human_input",
+        "steps": state["steps"],
+        "final_answer": None,
+        "error": None,
+        "question": "Which root?",
+    }]
+
+
+def test_watch_answers_agents_and_retries_failed_requests(client, use_responder):
+    use_responder(ask_then_answer)
+    asked = []
+
+    async def watch():
+        async with await _in_process_client() as async_client:
+            ids = [(await async_client.launch(f"watch {uuid.uuid4()}"))["id"] for _ in range(5)]
+            ids.append(str(uuid.uuid4()))
+
+            # The first bulk poll and the first answer fail; both are retried instead of ending the watch
+            get_state_summaries, provide_input = async_client.get_state_summaries, async_client.provide_input
+            failures = {"poll": 1, "answer": 1}
+
+            async def flaky_get_state_summaries(state_ids):
+                if failures["poll"]:
+                    failures["poll"] -= 1
+                    raise httpx.ConnectError("connection refused")
+                return await get_state_summaries(state_ids)
+
+            async def flaky_provide_input(state_id, answer):
+                if failures["answer"]:
+                    failures["answer"] -= 1
+                    request = httpx.Request("POST", "http://test/agent/provide_input")
+                    response = httpx.Response(429, headers={"Retry-After": "0"}, request=request)
+                    raise httpx.HTTPStatusError("429 Too Many Requests", request=request, response=response)
+                return await provide_input(state_id, answer)
+
+            async_client.get_state_summaries = flaky_get_state_summaries
+            async_client.provide_input = flaky_provide_input
+            results = await async_client.watch(
+                ids,
+                on_human_input=lambda state, question: asked.append((state["id"], question)) or "x = 2",
+                min_interval=0.01,
+                max_interval=0.1,
+            )
+            return ids, results
+
+    ids, results = asyncio.run(watch())
+
+    assert results[ids[-1]] is None
+    for state_id in ids[:-1]:
+        assert results[state_id]["status"] == "complete"
+        assert "x = 2" in results[state_id]["final_answer"]
+    # Every agent was asked exactly once, including the one whose first answer failed
+    assert sorted(asked) == sorted((state_id, "Which root?") for state_id in ids[:-1])
+
+
+def test_watch_answers_waiting_agents_concurrently(client, use_responder):
+    use_responder(ask_then_answer)
+    ids = [client.post("/agent/launch", json={"input_prompt": f"concurrent {uuid.uuid4()}"}).json()["id"] for _ in range(6)]
+    for state_id in ids:
+        assert wait_for(client, state_id)["status"] == "waiting_human_input"
+    in_flight = {"now": 0, "peak": 0}
+
+    async def on_human_input(state, question):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.05)
+        in_flight["now"] -= 1
+        return "x = 3"
+
+    async def watch():
+        async with await _in_process_client() as async_client:
+            return await async_client.watch(ids, on_human_input=on_human_input, min_interval=0.01, max_concurrent_answers=4)
+
+    results = asyncio.run(watch())
+    assert all(results[state_id]["status"] == "complete" for state_id in ids)
+    assert in_flight["peak"] == 4
@@ -0,0 +1,30 @@
+import uuid
+
+from tests.conftest import add_then_answer, wait_for
+
+
+def test_budget_exceeded_run_resumes_with_a_larger_budget(client, use_responder):
+    use_responder(add_then_answer)
+    launched = client.post("/agent/launch", json={"input_prompt": f"budget {uuid.uuid4()}", "token_budget": 1}).json()
+
+    state = wait_for(client, launched["id"])
+    assert state["status"] == "budget_exceeded"
+    assert state["final_answer"] is None
+    assert [usage["step"] for usage in state["step_usage"]] == [1]
+
+    client.post("/agent/resume", json={"id": state["id"], "token_budget": 1_000_000})
+    state = wait_for(client, state["id"])
+    assert state["status"] == "complete"
+    assert state["token_budget"] == 1_000_000
+    assert state["usage"]["input_tokens"] == sum(usage["input_tokens"] for usage in state["step_usage"])
+
+
+def test_usage_endpoint_sums_runs(client, use_responder):
+    use_responder(add_then_answer)
+    before = client.get("/agent/usage").json()
+    state = wait_for(client, client.post("/agent/launch", json={"input_prompt": f"usage {uuid.uuid4()}"}).json()["id"])
+    after = client.get("/agent/usage").json()
+
+    assert after["runs"] == before["runs"] + 1
+    assert after["totals"]["input_tokens"] == before["totals"]["input_tokens"] + state["usage"]["input_tokens"]
+    assert after["by_status"]["complete"]["runs"] == before["by_status"].get("complete", {"runs": 0})["runs"] + 1
@@ -0,0 +1,72 @@
+import io
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from server import export
+from server.export import iter_parquet, iter_runs, iter_steps
+from tests.conftest import add_then_answer, wait_for
+
+
+@pytest.fixture
+def runs(client, use_responder):
+    """Five completed runs, and the time just before they were launched"""
+    use_responder(add_then_answer)
+    since = datetime.utcnow()
+    ids = [client.post("/agent/launch", json={"input_prompt": f"export {uuid.uuid4()}"}).json()["id"] for _ in range(5)]
+    for state_id in ids:
+        assert wait_for(client, state_id)["status"] == "complete"
+    return since, sorted(ids)
+
+
+def test_iter_runs_reads_every_run_in_chunks(runs):
+    since, ids = runs
+    exported = list(iter_runs(since=since, chunk_size=2))
+    assert [run["id"] for run in exported] == ids
+    assert all(run["context"][0]["content"].startswith("export ") for run in exported)
+    assert [run["id"] for run in iter_runs(statuses=["complete"], since=since, chunk_size=2)] == ids
+    assert list(iter_runs(statuses=["failed"], since=since)) == []
+
+
+def test_export_endpoint_streams_jsonl(client, runs):
+    since, ids = runs
+    response = client.get("/agent/export", params={"since": since.isoformat(), "chunk_size": 2})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ids
+    assert all(line["usage"]["input_tokens"] > 0 and line["final_answer"] for line in lines)
+
+
+def test_iter_steps_yields_one_row_per_step(runs):
+    since, ids = runs
+    (run,) = [run for run in iter_runs(since=since) if run["id"] == ids[0]]
+    steps = list(iter_steps([run]))
+    assert [step["step"] for step in steps] == [1, 2, 3]
+    assert all(step["state_id"] == run["id"] for step in steps)
+    assert sum(step["input_tokens"] for step in steps) == run["usage"]["input_tokens"]
+
+    # Each row carries what its own LLM call produced; the calls run (and land in items) one step later
+    assert [step["function_calls"] for step in steps] == [["sum_numbers"], ["final_answer"], []]
+    assert json.loads(steps[0]["llm_output"])[0]["arguments"] == {"a": 2, "b": 3}
+    assert json.loads(steps[0]["items"]) == []
+    assert [item["name"] for item in json.loads(steps[1]["items"]) if item.get("type") == "function_call"] == ["sum_numbers"]
+    assert steps[2]["input_tokens"] == 0
+
+
+def test_parquet_export_without_pyarrow_is_reported(client, monkeypatch):
+    monkeypatch.setattr(export, "pa", None)
+    with pytest.raises(export.ExportUnavailable):
+        iter_parquet([])
+    assert client.get("/agent/export", params={"format": "parquet"}).status_code == 501
+
+
+def test_parquet_export_round_trips(runs):
+    pq = pytest.importorskip("pyarrow.parquet")
+    since, ids = runs
+    data = b"".join(iter_parquet(iter_steps(iter_runs(since=since)), row_group_size=4))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 15
+    assert table.column("function_calls").to_pylist()[:3] == [["sum_numbers"], ["final_answer"], []]
+    assert sorted(set(table.column("state_id").to_pylist())) == ids
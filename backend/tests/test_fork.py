@@ -0,0 +1,38 @@
+import uuid
+
+from tests.conftest import add_then_answer, wait_for
+
+
+def test_fork_reuses_cached_responses_of_its_lineage_only(client, use_responder):
+    backend = use_responder(add_then_answer)
+    prompt = f"fork {uuid.uuid4()}"
+
+    parent = wait_for(client, client.post("/agent/launch", json={"input_prompt": prompt}).json()["id"])
+    assert parent["status"] == "complete"
+    assert backend.requests == 2
+
+    fork = client.post("/agent/fork", json={"id": parent["id"], "step": 1}).json()
+    assert fork["parent_id"] == parent["id"]
+    assert fork["lineage_id"] == parent["id"]
+    assert fork["context"] == parent["context"][:fork["fork_index"]]
+    client.post("/agent/resume", json={"id": fork["id"]})
+    fork = wait_for(client, fork["id"])
+    assert fork["status"] == "complete"
+    assert fork["final_answer"] == parent["final_answer"]
+    assert backend.requests == 2
+
+    # An unrelated run with the same prompt does not share the lineage's responses
+    other = wait_for(client, client.post("/agent/launch", json={"input_prompt": prompt}).json()["id"])
+    assert other["status"] == "complete"
+    assert other["usage"]["input_tokens"] > 0
+    assert backend.requests == 4
+
+
+def test_fork_rejects_a_step_without_checkpoint(client, use_responder):
+    use_responder(add_then_answer)
+    parent = wait_for(client, client.post("/agent/launch", json={"input_prompt": f"fork {uuid.uuid4()}"}).json()["id"])
+
+    assert client.post("/agent/fork", json={"id": parent["id"], "step": 99}).status_code == 400
+    # The final step completed the run, so there is nothing left to branch from
+    assert client.post("/agent/fork", json={"id": parent["id"]}).status_code == 400
+    assert client.post("/agent/fork", json={"id": str(uuid.uuid4())}).status_code == 404
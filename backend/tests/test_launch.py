@@ -0,0 +1,58 @@
+import threading
+import uuid
+
+import server.main as server_main
+from tests.conftest import add_then_answer, wait_for
+
+
+def test_dedup_launch_attaches_to_the_same_run(client, use_responder):
+    use_responder(add_then_answer)
+    prompt = f"dedup {uuid.uuid4()}"
+
+    first = client.post("/agent/launch", json={"input_prompt": prompt, "dedup": True}).json()
+    wait_for(client, first["id"])
+    response = client.post("/agent/launch", json={"input_prompt": prompt, "dedup": True})
+    assert response.json()["id"] == first["id"]
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+    # Launches without dedup always start a new run
+    undeduplicated = client.post("/agent/launch", json={"input_prompt": prompt}).json()
+    assert undeduplicated["id"] != first["id"]
+    wait_for(client, undeduplicated["id"])
+
+
+def test_idempotency_key_replays_the_run_and_rejects_a_different_body(client, use_responder):
+    use_responder(add_then_answer)
+    prompt = f"idempotent {uuid.uuid4()}"
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    keyed = client.post("/agent/launch", json={"input_prompt": prompt}, headers=headers).json()
+    assert client.post("/agent/launch", json={"input_prompt": prompt}, headers=headers).json()["id"] == keyed["id"]
+    wait_for(client, keyed["id"])
+
+    # Reusing the key for a different request is an error rather than a replay
+    response = client.post("/agent/launch", json={"input_prompt": prompt + " changed"}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_only_idempotent_and_dedup_launches_take_the_launch_lock(client, use_responder):
+    use_responder(add_then_answer)
+    responses = {}
+
+    def launch(name, **kwargs):
+        responses[name] = client.post("/agent/launch", json={"input_prompt": f"lock {uuid.uuid4()}"}, **kwargs)
+
+    with server_main._launch_lock:
+        plain = threading.Thread(target=launch, args=("plain",))
+        keyed = threading.Thread(target=launch, args=("keyed",), kwargs={"headers": {"Idempotency-Key": str(uuid.uuid4())}})
+        plain.start()
+        keyed.start()
+        plain.join(timeout=5)
+        assert "plain" in responses
+        keyed.join(timeout=0.2)
+        assert keyed.is_alive()
+    keyed.join(timeout=5)
+
+    for response in responses.values():
+        assert response.status_code == 200
+        wait_for(client, response.json()["id"])
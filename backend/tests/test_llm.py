@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from client.loadtest import FakeResponsesServer
+from core.llm import LLMBackend, OpenAIBackend
+
+
+@pytest.fixture
+def fake_server():
+    server = FakeResponsesServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_openai_backend_reuses_pooled_connections(fake_server):
+    # A short timeout so a request the fake server drops is retried quickly instead of after 120s
+    backend = OpenAIBackend(
+        base_url=fake_server.base_url, api_key="test", max_connections=5, max_keepalive_connections=5, timeout=5.0
+    )
+    try:
+        assert backend._get_client().timeout == 5.0
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            list(executor.map(
+                lambda _: backend.create_response("gpt-5", "", [{"role": "user", "content": "hi"}], []),
+                range(100),
+            ))
+        stats = backend.stats()
+    finally:
+        backend.close()
+
+    # The SDK retries the odd request whose connection the fake server reset, on a new connection
+    assert stats["requests"] >= 100
+    assert 1 <= stats["connections_opened"] <= 10
+    assert stats["connection_reuse_ratio"] >= 0.9
+
+
+def test_backend_without_create_response_cannot_be_constructed():
+    class IncompleteBackend(LLMBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+import server.main as server_main
+from core.client_tool import ClientTool
+from core.tools.math import (
+    EVALUATE_EXPRESSION_DESCRIPTION,
+    EVALUATE_EXPRESSION_PARAMETERS,
+    MAX_TOTAL_ELEMENTS,
+    evaluate_expression,
+)
+
+
+def test_evaluate_expression():
+    assert evaluate_expression("x^2 - 5*x + 6", {"x": 2}) == 0
+    assert evaluate_expression("(-b + sqrt(b^2 - 4*a*c)) / (2*a)", {"a": 1, "b": -5, "c": 6}) == 3
+    assert evaluate_expression("[1, 2, 3] * 2 + x", {"x": [10, 20, 30]}) == [12, 24, 36]
+    assert evaluate_expression("mean(x) + max(1, 2)", {"x": [1, 2, 3]}) == 4
+
+
+@pytest.mark.parametrize("expression, variables", [
+    ("__import__('os').system('true')", None),
+    ("x.__class__", {"x": 1}),
+    ("(lambda: 1)()", None),
+    ("10 ** 10 ** 10", None),
+    ("1 / 0", None),
+    ("x + [1, 2]", {"x": [1, 2, 3]}),
+    ("x", {"x": "1"}),
+    ("x", {"x": [[0.0] * 10000] * 10000}),
+    ("x", {"x": [1.0] * (MAX_TOTAL_ELEMENTS + 1)}),
+    ("[x, x, x, x, x, x, x, x, x, x, x]", {"x": [1.0] * 10000}),
+])
+def test_evaluate_expression_rejects_unsafe_or_unbounded_input(expression, variables):
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        evaluate_expression(expression, variables)
+    assert time.monotonic() - start < 2
+
+
+def _assert_strict(schema, path="parameters"):
+    # Strict mode: every object lists all its properties as required and allows no others;
+    # every array declares its items
+    for option in schema.get("anyOf", []):
+        _assert_strict(option, path)
+    types = schema.get("type", [])
+    types = types if isinstance(types, list) else [types]
+    if "object" in types:
+        assert schema.get("additionalProperties") is False, path
+        assert sorted(schema.get("required", [])) == sorted(schema.get("properties", {})), path
+        for name, property_schema in schema["properties"].items():
+            _assert_strict(property_schema, f"{path}.{name}")
+    if "array" in types:
+        assert "items" in schema, path
+        _assert_strict(schema["items"], f"{path}[]")
+
+
+def test_tool_schemas_are_strict_compatible():
+    for schema in server_main.agent.tool_schemas:
+        _assert_strict(schema["parameters"], schema["name"])
+
+
+def test_evaluate_expression_tool_takes_variable_pairs():
+    tool = ClientTool("evaluate_expression", EVALUATE_EXPRESSION_DESCRIPTION, evaluate_expression, parameters=EVALUATE_EXPRESSION_PARAMETERS)
+    assert tool.execute(expression="x * y", variables=[{"name": "x", "value": [1, 2]}, {"name": "y", "value": 3}]) == [3, 6]
+    assert tool.execute(expression="2 + 2", variables=None) == 4
+    with pytest.raises(ValueError):
+        tool.execute(expression="x", variables=[{"x": 1}])
+
+
+def test_optional_arguments_are_nullable_and_fall_back_to_defaults():
+    def scale(x: float, factor: float = 2.0) -> float:
+        return x * factor
+
+    tool = ClientTool("scale", "Scale a number", scale)
+    assert tool.schema["parameters"]["properties"]["factor"] == {"type": ["number", "null"]}
+    assert tool.schema["parameters"]["required"] == ["x", "factor"]
+    assert tool.execute(x=3, factor=None) == 6
@@ -0,0 +1,79 @@
+import json
+import uuid
+
+from tests.conftest import first_prompt, tool_outputs, wait_for
+
+
+def fan_out(tasks):
+    """Responder for a parent spawning `tasks` and answering with its children's statuses"""
+    def responder(context):
+        if first_prompt(context) == "never finishes":
+            return [{"name": "sum_numbers", "arguments": {"a": 1, "b": 1}}]
+        if first_prompt(context) in tasks:
+            return [{"name": "final_answer", "arguments": {"answer": first_prompt(context).upper()}}]
+        outputs = tool_outputs(context)
+        if not outputs:
+            return [{"name": "spawn_subagents", "arguments": {"tasks": tasks}}]
+        results = json.loads(outputs[-1]["output"])["result"]
+        return [{"name": "final_answer", "arguments": {"answer": ",".join(f"{r['status']}:{r['answer']}" for r in results)}}]
+    return responder
+
+
+def test_subagents_run_and_persist_their_final_status(client, use_responder):
+    use_responder(fan_out(["finishes", "never finishes"]))
+    parent = wait_for(client, client.post("/agent/launch", json={"input_prompt": f"fan out {uuid.uuid4()}"}).json()["id"])
+    assert parent["status"] == "complete"
+    assert parent["final_answer"] == "complete:FINISHES,max_steps_reached:None"
+
+    children = {child["context"][0]["content"]: child for child in client.get(f"/agent/state/{parent['id']}/children").json()}
+    assert children["finishes"]["status"] == "complete"
+    assert children["never finishes"]["status"] == "max_steps_reached"
+    assert all(child["spawned_by"] == parent["id"] and child["depth"] == 1 for child in children.values())
+
+
+def test_subagents_cannot_spawn_further_subagents(client, use_responder):
+    def responder(context):
+        outputs = tool_outputs(context)
+        if first_prompt(context) == "nested":
+            if not outputs:
+                return [{"name": "spawn_subagents", "arguments": {"tasks": ["deeper"]}}]
+            return [{"name": "final_answer", "arguments": {"answer": outputs[-1]["output"]}}]
+        return fan_out(["nested"])(context)
+
+    use_responder(responder)
+    parent = wait_for(client, client.post("/agent/launch", json={"input_prompt": f"fan out {uuid.uuid4()}"}).json()["id"])
+    assert parent["status"] == "complete"
+    assert "cannot spawn further sub-agents" in parent["final_answer"]
+    (child,) = client.get(f"/agent/state/{parent['id']}/children").json()
+    assert client.get(f"/agent/state/{child['id']}/children").json() == []
+
+
+def test_subagents_cannot_wait_for_human_input(client, use_responder, monkeypatch):
+    def responder(context):
+        outputs = tool_outputs(context)
+        if first_prompt(context) == "needs input":
+            if not outputs:
+                return [{"name": "ask_human", "arguments": {"question": "Which root?"}}]
+            return [{"name": "final_answer", "arguments": {"answer": outputs[-1]["output"]}}]
+        return fan_out(["needs input"])(context)
+
+    backend = use_responder(responder)
+    offered = {}
+    create_response = backend.create_response
+
+    def recording_create_response(model, instructions, input, tools, reasoning=None):
+        offered.setdefault(first_prompt(input), {schema["name"] for schema in tools})
+        return create_response(model, instructions, input, tools, reasoning)
+
+    monkeypatch.setattr(backend, "create_response", recording_create_response)
+    prompt = f"fan out {uuid.uuid4()}"
+    parent = wait_for(client, client.post("/agent/launch", json={"input_prompt": prompt}).json()["id"])
+
+    assert "ask_human" in offered[prompt]
+    assert "ask_human" not in offered["needs input"]
+    # A child calling it anyway gets an error result and finishes instead of waiting forever
+    assert parent["status"] == "complete"
+    assert parent["final_answer"].startswith("complete:")
+    assert "cannot ask the user" in parent["final_answer"]
+    (child,) = client.get(f"/agent/state/{parent['id']}/children").json()
+    assert child["status"] == "complete"
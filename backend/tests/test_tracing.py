@@ -0,0 +1,70 @@
+import sys
+import uuid
+
+import pytest
+
+import server.main as server_main
+from core.agent import Agent
+from core.client_tool import ClientTool
+from core.llm import LocalBackend
+from core.models.state import State
+from core.tools.math import sum_numbers
+from core.tracing import SpanRecorder
+from server.database import save_trace_events
+from tests.conftest import add_then_answer, tool_outputs, wait_for
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = SpanRecorder(sink=save_trace_events)
+    monkeypatch.setattr(server_main.agent, "tracer", recorder)
+    return recorder
+
+
+def test_trace_endpoint_returns_the_spans_of_a_run(client, use_responder, recorder):
+    use_responder(add_then_answer)
+    state = wait_for(client, client.post("/agent/launch", json={"input_prompt": f"trace {uuid.uuid4()}"}).json()["id"])
+    assert state["status"] == "complete"
+
+    trace = client.get(f"/agent/trace/{state['id']}").json()
+    events = trace["traceEvents"]
+    spans = [(event["cat"], event["name"]) for event in events if event["ph"] == "X"]
+    assert spans == [
+        ("llm", "llm"), ("step", "step 1"),
+        ("tool", "sum_numbers"), ("llm", "llm"), ("step", "step 2"),
+        ("step", "step 3"),  # Runs the final_answer call without asking the LLM again
+    ]
+    assert [event["args"]["step"] for event in events if event["ph"] == "i"] == [0, 1, 2, 3]
+    assert all(event["dur"] >= 0 for event in events if event["ph"] == "X")
+    # Everything was handed to the sink, nothing is left open or buffered
+    assert recorder.events == {} and recorder._open == {}
+
+
+def test_trace_of_unknown_state_is_404(client):
+    assert client.get(f"/agent/trace/{uuid.uuid4()}").status_code == 404
+
+
+def test_failed_run_stops_profiling_and_keeps_its_spans():
+    def failing_responder(context):
+        if tool_outputs(context):
+            raise RuntimeError("LLM unavailable")
+        return [{"name": "sum_numbers", "arguments": {"a": 1, "b": 2}}]
+
+    sunk = []
+    recorder = SpanRecorder(sink=lambda state_id, events: sunk.extend(events))
+    agent = Agent(
+        tools=[ClientTool(name="sum_numbers", description="Sum two numbers", function=sum_numbers)],
+        backend=LocalBackend(failing_responder),
+        tracer=recorder,
+        profile_sample_rate=1.0,
+    )
+    state = State(id=str(uuid.uuid4()), context=[{"role": "user", "content": "add"}])
+
+    with pytest.raises(RuntimeError):
+        agent.run(state)
+
+    assert sys.getprofile() is None
+    assert recorder._open == {} and recorder.events == {}
+    unfinished = [(event["cat"], event["name"]) for event in sunk if event["args"].get("unfinished")]
+    assert unfinished == [("llm", "llm"), ("step", "step 2")]
+    assert any(event["name"] == "profile" for event in sunk)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useRef } from 'react'
+import React, { useState, useEffect, useRef, useCallback } from 'react'
 import TaskForm from './components/TaskForm'
 import AgentStatus from './components/AgentStatus'
 import ExecutionView from './components/ExecutionView'
@@ -7,10 +7,37 @@ import AgentHistory from './components/AgentHistory'
 import { agentAPI } from './api/client'
 import './App.css'
 
-const TERMINAL_STATUSES = ['complete', 'failed', 'max_steps_reached']
+const TERMINAL_STATUSES = ['complete', 'failed', 'max_steps_reached', 'budget_exceeded']
 const NON_RESUMABLE_STATUSES = ['complete', 'failed'] // Statuses that cannot be resumed
 const POLL_INTERVAL = 2000 // 2 seconds
 
+// Merge a freshly polled state into the stored one. Context is append-only, so existing
+// items keep their object identity and only the new tail is added; memoized item
+// components therefore skip re-rendering everything they have already shown.
+const mergeAgentState = (prev, next) => {
+  if (!prev || prev.id !== next.id) return next
+
+  const prevContext = prev.context || []
+  const nextContext = next.context || []
+  let context = nextContext
+  if (nextContext.length >= prevContext.length) {
+    context = nextContext.length === prevContext.length
+      ? prevContext
+      : prevContext.concat(nextContext.slice(prevContext.length))
+  }
+
+  const unchanged =
+    context === prevContext &&
+    prev.status === next.status &&
+    prev.steps === next.steps &&
+    prev.final_answer === next.final_answer &&
+    prev.error === next.error &&
+    JSON.stringify(prev.pending_tool_calls) === JSON.stringify(next.pending_tool_calls)
+  if (unchanged) return prev
+
+  return { ...next, context }
+}
+
 function App() {
   const [agents, setAgents] = useState([])
   const [selectedAgent, setSelectedAgent] = useState(null)
@@ -74,13 +101,15 @@ function App() {
     }, POLL_INTERVAL)
   }
 
-  // Update agent in list
+  // Update agent in list, merging only what changed
   const updateAgentState = (state) => {
     setAgents((prev) => {
       const index = prev.findIndex((a) => a.id === state.id)
       if (index >= 0) {
+        const merged = mergeAgentState(prev[index], state)
+        if (merged === prev[index]) return prev
         const updated = [...prev]
-        updated[index] = state
+        updated[index] = merged
         return updated
       } else {
         return [...prev, state]
@@ -89,7 +118,7 @@ function App() {
 
     // Update selected agent if it matches (using ref to avoid stale closure)
     if (selectedAgentIdRef.current === state.id) {
-      setSelectedAgent(state)
+      setSelectedAgent((prev) => mergeAgentState(prev, state))
     }
   }
 
@@ -110,8 +139,8 @@ function App() {
     }
   }
 
-  // Select agent from history
-  const handleSelectAgent = async (agentId) => {
+  // Select agent from history (stable identity so memoized history items don't re-render)
+  const handleSelectAgent = useCallback(async (agentId) => {
     try {
       const state = await agentAPI.getState(agentId)
       setSelectedAgent(state)
@@ -124,7 +153,7 @@ function App() {
     } catch (error) {
       console.error('Error fetching agent state:', error)
     }
-  }
+  }, [])
 
   // Resume agent
   const handleResume = async () => {
@@ -208,6 +237,7 @@ function App() {
                     </button>
                   )}
                   {selectedAgent.status !== 'running' &&
+                    selectedAgent.status !== 'pending' &&
                     selectedAgent.status !== 'waiting_human_input' &&
                     !NON_RESUMABLE_STATUSES.includes(selectedAgent.status) && (
                       <button onClick={handleResume} className="resume-button">
@@ -220,6 +250,7 @@ function App() {
               <AgentStatus
                 status={selectedAgent.status}
                 steps={selectedAgent.steps}
+                usage={selectedAgent.usage}
                 finalAnswer={selectedAgent.final_answer}
                 error={selectedAgent.error}
               />
@@ -1,25 +1,52 @@
-import React from 'react'
+import React, { memo } from 'react'
 
 const statusColors = {
+  pending: '#9ca3af',
   running: '#3b82f6',
   complete: '#10b981',
   failed: '#ef4444',
   waiting_human_input: '#f59e0b',
   max_steps_reached: '#8b5cf6',
+  budget_exceeded: '#dc2626',
 }
 
-const AgentHistory = ({ agents, onSelectAgent, selectedId }) => {
-  const getInitialPrompt = (context) => {
-    const userMessage = context.find(item => 
-      (typeof item === 'object' && item.role === 'user') ||
-      (typeof item === 'string' && item.includes('user'))
-    )
-    if (userMessage?.content) return userMessage.content
-    if (userMessage && typeof userMessage === 'string') return userMessage
-    if (context[0]?.content) return context[0].content
-    return 'No prompt available'
-  }
+const getInitialPrompt = (context) => {
+  const userMessage = context.find(item => 
+    (typeof item === 'object' && item.role === 'user') ||
+    (typeof item === 'string' && item.includes('user'))
+  )
+  if (userMessage?.content) return userMessage.content
+  if (userMessage && typeof userMessage === 'string') return userMessage
+  if (context[0]?.content) return context[0].content
+  return 'No prompt available'
+}
+
+// Only re-renders when this agent's summary fields (or selection) change
+const HistoryItem = memo(({ id, status, steps, prompt, isSelected, onSelectAgent }) => {
+  const statusColor = statusColors[status] || '#6b7280'
+
+  return (
+    <div
+      className={`history-item ${isSelected ? 'selected' : ''}`}
+      onClick={() => onSelectAgent(id)}
+    >
+      <div className="history-item-header">
+        <div
+          className="status-indicator"
+          style={{ backgroundColor: statusColor }}
+        ></div>
+        <span className="agent-id">{id.slice(0, 8)}...</span>
+      </div>
+      <p className="history-prompt">{prompt.slice(0, 60)}...</p>
+      <div className="history-meta">
+        <span>Steps: {steps}</span>
+        <span className="status-text">{status}</span>
+      </div>
+    </div>
+  )
+})
 
+const AgentHistory = ({ agents, onSelectAgent, selectedId }) => {
   return (
     <div className="agent-history">
       <h3>Agent History</h3>
@@ -27,37 +54,22 @@ const AgentHistory = ({ agents, onSelectAgent, selectedId }) => {
         {agents.length === 0 ? (
           <div className="empty-state">No agents launched yet</div>
         ) : (
-          agents.map((agent) => {
-            const prompt = getInitialPrompt(agent.context || [])
-            const statusColor = statusColors[agent.status] || '#6b7280'
-            const isSelected = agent.id === selectedId
-
-            return (
-              <div
-                key={agent.id}
-                className={`history-item ${isSelected ? 'selected' : ''}`}
-                onClick={() => onSelectAgent(agent.id)}
-              >
-                <div className="history-item-header">
-                  <div
-                    className="status-indicator"
-                    style={{ backgroundColor: statusColor }}
-                  ></div>
-                  <span className="agent-id">{agent.id.slice(0, 8)}...</span>
-                </div>
-                <p className="history-prompt">{prompt.slice(0, 60)}...</p>
-                <div className="history-meta">
-                  <span>Steps: {agent.steps}</span>
-                  <span className="status-text">{agent.status}</span>
-                </div>
-              </div>
-            )
-          })
+          agents.map((agent) => (
+            <HistoryItem
+              key={agent.id}
+              id={agent.id}
+              status={agent.status}
+              steps={agent.steps}
+              prompt={getInitialPrompt(agent.context || [])}
+              isSelected={agent.id === selectedId}
+              onSelectAgent={onSelectAgent}
+            />
+          ))
         )}
       </div>
     </div>
   )
 }
 
-export default AgentHistory
+export default memo(AgentHistory)
 
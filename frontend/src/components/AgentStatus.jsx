@@ -1,24 +1,28 @@
 import React from 'react'
 
 const statusColors = {
+  pending: '#9ca3af',
   running: '#3b82f6',
   paused: '#f59e0b',
   complete: '#10b981',
   failed: '#ef4444',
   waiting_human_input: '#f59e0b',
   max_steps_reached: '#8b5cf6',
+  budget_exceeded: '#dc2626',
 }
 
 const statusLabels = {
+  pending: 'Queued',
   running: 'Running',
   paused: 'Paused',
   complete: 'Complete',
   failed: 'Failed',
   waiting_human_input: 'Waiting for Input',
   max_steps_reached: 'Max Steps Reached',
+  budget_exceeded: 'Budget Exceeded',
 }
 
-const AgentStatus = ({ status, steps, finalAnswer, error }) => {
+const AgentStatus = ({ status, steps, usage, finalAnswer, error }) => {
   const statusColor = statusColors[status] || '#6b7280'
   const statusLabel = statusLabels[status] || status
 
@@ -29,7 +33,15 @@ const AgentStatus = ({ status, steps, finalAnswer, error }) => {
           <span className="status-dot"></span>
           {statusLabel}
         </div>
-        <div className="steps-counter">Step {steps}</div>
+        <div className="steps-counter">
+          Step {steps}
+          {usage && (
+            <span>
+              {' · '}{(usage.input_tokens + usage.output_tokens).toLocaleString()} tokens
+              {' · '}${usage.cost_usd.toFixed(4)}
+            </span>
+          )}
+        </div>
       </div>
       
       {finalAnswer && (
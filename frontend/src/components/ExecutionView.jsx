@@ -1,115 +1,122 @@
-import React from 'react'
+import React, { memo } from 'react'
+import VirtualList from './VirtualList'
 
-const ExecutionView = ({ context, pendingToolCalls }) => {
-  const renderContextItem = (item, index) => {
-    if (typeof item === 'string') {
-      return (
-        <div key={index} className="context-item context-text">
-          {item}
-        </div>
-      )
-    }
+const formatArgs = (rawArgs) => {
+  const args = typeof rawArgs === 'string' ? JSON.parse(rawArgs) : rawArgs
+  return Object.entries(args)
+    .map(([key, value]) => `${key}: ${typeof value === 'object' ? JSON.stringify(value) : value}`)
+    .join(', ')
+}
 
-    if (item.type === 'function_call') {
-      const args = typeof item.arguments === 'string' 
-        ? JSON.parse(item.arguments) 
-        : item.arguments
-      
-      // Format arguments as compact inline text
-      const argsText = Object.entries(args)
-        .map(([key, value]) => `${key}: ${typeof value === 'object' ? JSON.stringify(value) : value}`)
-        .join(', ')
-      
-      return (
-        <div key={index} className="context-item context-function-call">
-          <div className="function-call-header">
-            <span className="function-name">{item.name}</span>
-            <span className="call-id">#{item.call_id?.slice(0, 8)}</span>
-          </div>
-          <div className="function-args">{argsText}</div>
+// Context items never change once appended, so each one only renders when first shown
+const ContextItem = memo(({ item }) => {
+  if (typeof item === 'string') {
+    return (
+      <div className="context-item context-text">
+        {item}
+      </div>
+    )
+  }
+
+  if (item.type === 'function_call') {
+    // Format arguments as compact inline text
+    const argsText = formatArgs(item.arguments)
+
+    return (
+      <div className="context-item context-function-call">
+        <div className="function-call-header">
+          <span className="function-name">{item.name}</span>
+          <span className="call-id">#{item.call_id?.slice(0, 8)}</span>
         </div>
-      )
-    }
+        <div className="function-args">{argsText}</div>
+      </div>
+    )
+  }
 
-    if (item.type === 'function_call_output') {
-      let output
-      try {
-        output = typeof item.output === 'string' 
-          ? JSON.parse(item.output) 
-          : item.output
-      } catch {
-        output = item.output
-      }
+  if (item.type === 'function_call_output') {
+    let output
+    try {
+      output = typeof item.output === 'string' 
+        ? JSON.parse(item.output) 
+        : item.output
+    } catch {
+      output = item.output
+    }
 
-      // Format output as compact text
-      let outputText
-      if (typeof output === 'object' && output !== null) {
-        if (output.result !== undefined) {
-          outputText = String(output.result)
-        } else if (output.answer !== undefined) {
-          outputText = String(output.answer)
-        } else {
-          outputText = JSON.stringify(output)
-        }
+    // Format output as compact text
+    let outputText
+    if (typeof output === 'object' && output !== null) {
+      if (output.result !== undefined) {
+        outputText = String(output.result)
+      } else if (output.answer !== undefined) {
+        outputText = String(output.answer)
       } else {
-        outputText = String(output)
+        outputText = JSON.stringify(output)
       }
-
-      return (
-        <div key={index} className="context-item context-function-output">
-          <div className="function-output-header">
-            <span>Output</span>
-            <span className="call-id">#{item.call_id?.slice(0, 8)}</span>
-          </div>
-          <div className="function-output">{outputText}</div>
-        </div>
-      )
+    } else {
+      outputText = String(output)
     }
 
-    if (item.role === 'user' || item.role === 'assistant') {
-      return (
-        <div key={index} className={`context-item context-${item.role}`}>
-          <strong>{item.role === 'user' ? 'User' : 'Assistant'}:</strong> {item.content}
+    return (
+      <div className="context-item context-function-output">
+        <div className="function-output-header">
+          <span>Output</span>
+          <span className="call-id">#{item.call_id?.slice(0, 8)}</span>
         </div>
-      )
-    }
+        <div className="function-output">{outputText}</div>
+      </div>
+    )
+  }
 
+  if (item.role === 'user' || item.role === 'assistant') {
     return (
-      <div key={index} className="context-item">
-        <div>{JSON.stringify(item)}</div>
+      <div className={`context-item context-${item.role}`}>
+        <strong>{item.role === 'user' ? 'User' : 'Assistant'}:</strong> {item.content}
       </div>
     )
   }
 
+  return (
+    <div className="context-item">
+      <div>{JSON.stringify(item)}</div>
+    </div>
+  )
+})
+
+const PendingCall = memo(({ call }) => (
+  <div className="pending-call">
+    <span className="function-name">{call.name}</span>
+    <div className="pending-args">{formatArgs(call.arguments)}</div>
+  </div>
+))
+
+const getContextItemKey = (item, index) =>
+  item && typeof item === 'object' && item.call_id ? `${item.type}-${item.call_id}` : `item-${index}`
+
+const renderContextItem = (item) => <ContextItem item={item} />
+
+const ExecutionView = ({ context, pendingToolCalls }) => {
   return (
     <div className="execution-view">
       <h3>Execution Context</h3>
-      <div className="context-list">
-        {context.map((item, index) => renderContextItem(item, index))}
-      </div>
+      <VirtualList
+        className="context-list"
+        items={context}
+        getKey={getContextItemKey}
+        renderItem={renderContextItem}
+      />
       
       {pendingToolCalls && pendingToolCalls.length > 0 && (
         <div className="pending-calls">
           <h4>Pending Tool Calls:</h4>
-          {pendingToolCalls.map((call, index) => {
-            const args = typeof call.arguments === 'string' 
-              ? JSON.parse(call.arguments) 
-              : call.arguments
-            const argsText = Object.entries(args)
-              .map(([key, value]) => `${key}: ${typeof value === 'object' ? JSON.stringify(value) : value}`)
-              .join(', ')
-            return (
-              <div key={index} className="pending-call">
-                <span className="function-name">{call.name}</span>
-                <div className="pending-args">{argsText}</div>
-              </div>
-            )
-          })}
+          {pendingToolCalls.map((call, index) => (
+            <PendingCall key={call.call_id || index} call={call} />
+          ))}
         </div>
       )}
     </div>
   )
 }
 
-export default ExecutionView
+export default memo(ExecutionView)
 
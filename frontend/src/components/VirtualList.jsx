@@ -0,0 +1,108 @@
+import React, { useCallback, useEffect, useLayoutEffect, useRef, useState } from 'react'
+
+// Wrapper that reports its rendered height so the list can position items it has not measured yet
+const MeasuredItem = ({ itemKey, onResize, children }) => {
+  const ref = useRef(null)
+
+  useLayoutEffect(() => {
+    const node = ref.current
+    if (!node) return undefined
+    onResize(itemKey, node.offsetHeight)
+    const observer = new ResizeObserver(() => onResize(itemKey, node.offsetHeight))
+    observer.observe(node)
+    return () => observer.disconnect()
+  }, [itemKey, onResize])
+
+  return (
+    <div ref={ref} className="virtual-list-item">
+      {children}
+    </div>
+  )
+}
+
+// Windowed list: only the items inside (or near) the visible area are mounted
+const VirtualList = ({
+  items,
+  getKey,
+  renderItem,
+  className = '',
+  estimatedItemHeight = 64,
+  overscan = 6,
+  stickToBottom = true,
+}) => {
+  const containerRef = useRef(null)
+  const heightsRef = useRef(new Map())
+  const atBottomRef = useRef(true)
+  const [scrollTop, setScrollTop] = useState(0)
+  const [viewportHeight, setViewportHeight] = useState(0)
+  const [, setMeasureVersion] = useState(0)
+
+  const handleResize = useCallback((key, height) => {
+    if (heightsRef.current.get(key) !== height) {
+      heightsRef.current.set(key, height)
+      setMeasureVersion((version) => version + 1)
+    }
+  }, [])
+
+  useEffect(() => {
+    const node = containerRef.current
+    if (!node) return undefined
+    setViewportHeight(node.clientHeight)
+    const observer = new ResizeObserver(() => setViewportHeight(node.clientHeight))
+    observer.observe(node)
+    return () => observer.disconnect()
+  }, [])
+
+  // Prefix sums of item heights (measured where available, estimated otherwise)
+  const keys = items.map((item, index) => getKey(item, index))
+  const offsets = new Array(items.length + 1)
+  offsets[0] = 0
+  for (let i = 0; i < items.length; i++) {
+    offsets[i + 1] = offsets[i] + (heightsRef.current.get(keys[i]) ?? estimatedItemHeight)
+  }
+  const totalHeight = offsets[items.length]
+
+  // Binary search for the first item ending below the top of the viewport
+  let low = 0
+  let high = items.length
+  while (low < high) {
+    const mid = (low + high) >> 1
+    if (offsets[mid + 1] <= scrollTop) low = mid + 1
+    else high = mid
+  }
+  const start = Math.max(0, low - overscan)
+  let end = low
+  while (end < items.length && offsets[end] < scrollTop + viewportHeight) end++
+  end = Math.min(items.length, end + overscan)
+
+  // Follow new items while the user is scrolled to the bottom
+  useLayoutEffect(() => {
+    const node = containerRef.current
+    if (stickToBottom && node && atBottomRef.current) {
+      node.scrollTop = node.scrollHeight
+    }
+  }, [items.length, totalHeight, stickToBottom])
+
+  const handleScroll = (event) => {
+    const node = event.currentTarget
+    atBottomRef.current = node.scrollHeight - node.scrollTop - node.clientHeight < 4
+    setScrollTop(node.scrollTop)
+  }
+
+  return (
+    <div ref={containerRef} className={`virtual-list ${className}`} onScroll={handleScroll}>
+      <div style={{ height: offsets[start] }} />
+      {items.slice(start, end).map((item, i) => {
+        const index = start + i
+        return (
+          <MeasuredItem key={keys[index]} itemKey={keys[index]} onResize={handleResize}>
+            {renderItem(item, index)}
+          </MeasuredItem>
+        )
+      })}
+      <div style={{ height: totalHeight - offsets[end] }} />
+    </div>
+  )
+}
+
+export default VirtualList